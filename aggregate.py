@@ -0,0 +1,133 @@
+"""Time-windowed statistics over the monthly state gas series.
+
+state_stats computes any mix of per-state statistics for a date window in one
+vectorized pass over the (months x states) array. Each (window, statistic)
+result is cached separately, so asking for an overlapping set of statistics
+later only computes the ones not seen before.
+
+Statistic names:
+    mean, median, min, max, std, count
+    p<N>          N-th percentile, e.g. p5, p25, p95
+    winter_mean   Dec/Jan/Feb months in the window
+    summer_mean   Jun/Jul/Aug months in the window
+    winter_summer_ratio
+    trailing_12m_mean    average of the window's last 12 months
+    trailing_12m_change  window's last 12 months vs the 12 months before (fraction)
+
+The trailing statistics are NaN for a state unless it has a value in each of
+the 12 (or 24) months, so a short window never passes off a partial average.
+
+These are single values per state for the window; rolling_mean and yoy_change
+below return the full monthly series (yoy_change compares each month with the
+same month a year earlier, not 12-month averages).
+"""
+import functools
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data_loader import cache_get, cache_put, cached
+from pipeline import DEFAULT_END, DEFAULT_START, load_gas_monthly
+from snapshot import GAS_FILE
+
+DEFAULT_STATS = ('mean', 'median', 'p25', 'p75', 'winter_mean', 'summer_mean', 'trailing_12m_mean',
+                 'trailing_12m_change')
+WINTER_MONTHS = (12, 1, 2)
+SUMMER_MONTHS = (6, 7, 8)
+
+_PERCENTILE = re.compile(r'^p(\d{1,2}|100)$')
+_SIMPLE = {'mean', 'median', 'min', 'max', 'std', 'count', 'winter_mean', 'summer_mean',
+           'winter_summer_ratio', 'trailing_12m_mean', 'trailing_12m_change'}
+
+
+def _check(stats):
+    unknown = [s for s in stats if s not in _SIMPLE and not _PERCENTILE.match(s)]
+    if unknown:
+        raise ValueError(f'Unknown statistic(s): {", ".join(unknown)}')
+
+
+def _percentile(stat):
+    if stat == 'median':
+        return 50.0
+    match = _PERCENTILE.match(stat)
+    return float(match.group(1)) if match else None
+
+
+def _full_months(monthly):
+    # One row per calendar month, gaps included, so row counts, shifts and rolling windows count months
+    if monthly.empty:
+        return monthly
+    return monthly.reindex(pd.period_range(monthly.index[0], monthly.index[-1], freq='M', name='date'))
+
+
+def _compute(values, months, stats):
+    """The requested statistics (and only those) from a (months x states) array, one row per calendar month."""
+    percentiles = sorted({_percentile(s) for s in stats} - {None})
+    # All-NaN columns (states with no data in the window) yield NaN
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        by_percentile = dict(zip(percentiles, np.nanpercentile(values, percentiles, axis=0))) if percentiles else {}
+        # Shared by several statistics, computed on first use
+        season_mean = functools.cache(lambda season: np.nanmean(values[np.isin(months, season)], axis=0))
+
+        @functools.cache
+        def trailing_mean(n, skip=0):
+            # Mean of the n months before the last `skip`; NaN unless all n are present
+            rows = values[max(len(values) - n - skip, 0):len(values) - skip]
+            if len(rows) < n:
+                return np.full(values.shape[1], np.nan)
+            return np.where(np.isnan(rows).any(axis=0), np.nan, rows.mean(axis=0))
+
+        simple = {
+            'mean': lambda: np.nanmean(values, axis=0),
+            'min': lambda: np.nanmin(values, axis=0),
+            'max': lambda: np.nanmax(values, axis=0),
+            'std': lambda: np.nanstd(values, axis=0, ddof=1),
+            'count': lambda: np.sum(~np.isnan(values), axis=0).astype(float),
+            'winter_mean': lambda: season_mean(WINTER_MONTHS),
+            'summer_mean': lambda: season_mean(SUMMER_MONTHS),
+            'winter_summer_ratio': lambda: season_mean(WINTER_MONTHS) / season_mean(SUMMER_MONTHS),
+            'trailing_12m_mean': lambda: trailing_mean(12),
+            'trailing_12m_change': lambda: trailing_mean(12) / trailing_mean(12, 12) - 1,
+        }
+        return {s: by_percentile[_percentile(s)] if _percentile(s) is not None else simple[s]()
+                for s in stats}
+
+
+def state_stats(stats=DEFAULT_STATS, start=DEFAULT_START, end=DEFAULT_END, units='MWh', file_path=GAS_FILE):
+    """DataFrame indexed by state with one column per requested statistic."""
+    stats = list(stats)
+    _check(stats)
+    window = (pd.Timestamp(start), pd.Timestamp(end), units)
+    results = {s: cache_get(('gas_stat',) + window + (s,), [file_path]) for s in stats}
+    missing = [s for s, value in results.items() if value is None]
+    if missing:
+        monthly = _full_months(load_gas_monthly(units, file_path).loc[window[0]:window[1]])
+        computed = _compute(monthly.to_numpy(), monthly.index.month.to_numpy(), missing)
+        for s in missing:
+            value = pd.Series(computed[s], index=monthly.columns, name=s)
+            results[s] = cache_put(('gas_stat',) + window + (s,), [file_path], value)
+    return pd.DataFrame(results)
+
+
+# --- Time series ---
+def rolling_mean(months=12, units='MWh', file_path=GAS_FILE):
+    """Trailing `months`-month average per state (needs a full window of data)."""
+    return cached(('gas_rolling', months, units), [file_path],
+                  lambda: _full_months(load_gas_monthly(units, file_path)).rolling(months).mean())
+
+
+def yoy_change(units='MWh', file_path=GAS_FILE):
+    """Month-over-same-month-last-year change per state, as a fraction."""
+    def build():
+        monthly = _full_months(load_gas_monthly(units, file_path))
+        return monthly / monthly.shift(12) - 1
+
+    return cached(('gas_yoy', units), [file_path], build)
+
+
+def seasonal_means(start=DEFAULT_START, end=DEFAULT_END, units='MWh', file_path=GAS_FILE):
+    """Winter and summer average per state for a window."""
+    return state_stats(['winter_mean', 'summer_mean'], start, end, units, file_path)
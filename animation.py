@@ -0,0 +1,125 @@
+"""Month-by-month animated choropleth of state industrial gas prices.
+
+The (months x states) price array is rounded and converted to nested lists in
+one step; each animation frame is then just a row of that array, so no
+per-month DataFrame filtering or figure building happens. All frames share
+one colour range (95th percentile over the whole window) so colours are
+comparable month to month.
+
+The finished figure is serialized once to compact JSON and kept under
+snapshots/, keyed by window and the gas workbook's version; later loads read
+that file instead of rebuilding. Reading it costs well under a millisecond
+once it is in memory; most of a rerun of the animated view is st.plotly_chart
+validating every frame, about 30-100 ms. Only gas is animated: the
+electricity workbook holds a single average per state, not a monthly history.
+"""
+import json
+import os
+
+import numpy as np
+
+from features import data_version
+from pipeline import DEFAULT_END, DEFAULT_START, load_gas_monthly
+from snapshot import GAS_FILE, SNAPSHOT_DIR
+
+FRAME_DURATION_MS = 300
+COLORBAR_TITLE = 'Gas Price ($/MWh)'
+
+
+def animation_path(start=DEFAULT_START, end=DEFAULT_END, version=None):
+    version = (version or data_version([GAS_FILE])).replace(':', '-')
+    return os.path.join(SNAPSHOT_DIR, f'gas_animation_{start}_{end}_{version}.json')
+
+
+def _controls(names):
+    """Play/pause buttons and a month slider driving the frames."""
+    play = dict(frame=dict(duration=FRAME_DURATION_MS, redraw=True), fromcurrent=True,
+                transition=dict(duration=0))
+    pause = dict(frame=dict(duration=0, redraw=False), mode='immediate', transition=dict(duration=0))
+    steps = [dict(method='animate', label=name, args=[[name], dict(pause, frame=dict(duration=0, redraw=True))])
+             for name in names]
+    return dict(
+        updatemenus=[dict(type='buttons', showactive=False, x=0.05, y=0, xanchor='right', yanchor='top',
+                          buttons=[dict(label='Play', method='animate', args=[None, play]),
+                                   dict(label='Pause', method='animate', args=[[None], pause])])],
+        sliders=[dict(active=0, x=0.05, len=0.9, y=0, yanchor='top', pad=dict(t=30),
+                      currentvalue=dict(prefix='Month: '), steps=steps)],
+    )
+
+
+def build_animation(start=DEFAULT_START, end=DEFAULT_END, file_path=GAS_FILE):
+    """Plotly figure dict with one frame per month in [start, end]."""
+    monthly = load_gas_monthly('MWh', file_path).loc[start:end]
+    values = monthly.to_numpy()
+    zmin = float(np.nanmin(values))
+    zmax = float(np.nanpercentile(values, 95))
+    # NaN -> None (JSON null) and two decimals, for every month at once
+    z = np.where(np.isnan(values), None, np.round(values, 2)).tolist()
+    names = monthly.index.strftime('%Y-%m').tolist()
+    states = monthly.columns.tolist()
+
+    base = dict(
+        type='choropleth',
+        locations=states,
+        z=z[0],
+        locationmode='USA-states',
+        colorscale='Viridis',
+        zmin=zmin,
+        zmax=zmax,
+        colorbar=dict(title=dict(text=COLORBAR_TITLE)),
+        marker=dict(line=dict(color='white')),
+        hovertemplate='%{location}: $%{z:.2f}<extra></extra>',
+    )
+    frames = [dict(name=name, data=[dict(type='choropleth', z=row)], traces=[0]) for name, row in zip(names, z)]
+    layout = dict(
+        title=dict(text=f'Monthly Industrial Natural Gas Price by State ({names[0]} to {names[-1]}, $/MWh)',
+                   x=0.5, xanchor='center'),
+        geo=dict(scope='usa'),
+        height=700,
+        **_controls(names),
+    )
+    return dict(data=[base], layout=layout, frames=frames)
+
+
+# Serialized figures by file path; the path already encodes window and version
+_loaded = {}
+
+
+def _write(path, text):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+    # Drop files for older versions of the same window
+    prefix = os.path.basename(path).rsplit('_', 1)[0] + '_'
+    for name in os.listdir(SNAPSHOT_DIR):
+        if name.startswith(prefix) and name.endswith('.json') and name != os.path.basename(path):
+            os.remove(os.path.join(SNAPSHOT_DIR, name))
+
+
+def animation_json(start=DEFAULT_START, end=DEFAULT_END, file_path=GAS_FILE):
+    """Compact JSON for the animated figure, from memory or the on-disk copy when it is current."""
+    path = animation_path(start, end, data_version([file_path]))
+    if path not in _loaded:
+        if os.path.exists(path):
+            with open(path) as f:
+                _loaded[path] = f.read()
+        else:
+            text = json.dumps(build_animation(start, end, file_path), separators=(',', ':'))
+            try:
+                _write(path, text)
+            except OSError:
+                pass  # read-only checkout: serve from memory
+            _loaded[path] = text
+    return _loaded[path]
+
+
+def animation_figure(start=DEFAULT_START, end=DEFAULT_END):
+    """The animation as a go.Figure (for .show() / write_html)."""
+    import plotly.io as pio
+
+    return pio.from_json(animation_json(start, end))
+
+
+if __name__ == '__main__':
+    animation_figure().show()
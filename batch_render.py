@@ -0,0 +1,156 @@
+"""Headless batch rendering of map scenarios to HTML/JSON or static images.
+
+A scenario is one map: a view ('price' for the continuous gas-price map,
+'category' for the green/red threshold map), a date window and, for the
+category view, the two thresholds. Data for each distinct window and the
+label traces and base layout are built once in the parent process and handed
+to a process pool; workers only classify, assemble and write their figures.
+
+Usage:
+    python batch_render.py scenarios.json --out exports --format html
+    python batch_render.py --views price,category --windows 2020-01-01:2025-12-31,2022-01-01:2022-12-31 \\
+        --gas-thresholds 20,30,40 --elec-thresholds 90,105 --format png --workers 8
+
+The scenario file is a JSON list (or CSV) of objects with keys view, start,
+end, gas_threshold, elec_threshold and optionally labels (default true).
+Static image formats (png, svg, pdf) need the kaleido package. Running this
+file is the same as `python cli.py export`, which owns the options.
+"""
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from classify import classify
+from features import load_features
+from instrumentation import stage
+from pipeline import DEFAULT_END, DEFAULT_START
+from render import BASE_LAYOUT, category_traces, price_trace, state_label_traces
+
+VIEWS = ('price', 'category')
+DEFAULT_GAS_THRESHOLD = 30.0
+DEFAULT_ELEC_THRESHOLD = 105.0
+
+
+def normalize_scenario(scenario):
+    scenario = dict(scenario)
+    scenario.setdefault('view', 'category')
+    scenario.setdefault('start', DEFAULT_START)
+    scenario.setdefault('end', DEFAULT_END)
+    scenario.setdefault('gas_threshold', DEFAULT_GAS_THRESHOLD)
+    scenario.setdefault('elec_threshold', DEFAULT_ELEC_THRESHOLD)
+    scenario.setdefault('labels', True)
+    if scenario['view'] not in VIEWS:
+        raise ValueError(f"Unknown view {scenario['view']!r}; expected one of {', '.join(VIEWS)}")
+    return scenario
+
+
+def scenario_name(scenario):
+    name = f"{scenario['view']}_{scenario['start']}_{scenario['end']}"
+    if scenario['view'] == 'category':
+        name += f"_gas{scenario['gas_threshold']:g}_elec{scenario['elec_threshold']:g}"
+    return name
+
+
+# --- Shared components (built once in the parent) ---
+def build_shared(scenarios):
+    """Per-window data and pre-built traces, as plain JSON-able dicts for the workers."""
+    windows = {}
+    for start, end in {(s['start'], s['end']) for s in scenarios}:
+        features = load_features(start, end)
+        gas_df = features.frame(['nat_gas_price'])
+        merged_df = features.frame(['nat_gas_price', 'elec_price'], present=['elec_price'])
+        windows[(start, end)] = {
+            'merged': merged_df.to_dict('list'),
+            'price': price_trace(gas_df, 'nat_gas_price').to_plotly_json(),
+            'labels': [t.to_plotly_json() for t in state_label_traces(gas_df, 'nat_gas_price')],
+        }
+    return {'layout': BASE_LAYOUT, 'windows': windows}
+
+
+_shared = None
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def build_figure(scenario, shared):
+    window = shared['windows'][(scenario['start'], scenario['end'])]
+    if scenario['view'] == 'price':
+        data = [window['price']]
+        title = f"Average Natural Gas Price by State (Industrial Use, {scenario['start']} to {scenario['end']}, $/MWh)"
+    else:
+        merged_df = pd.DataFrame(window['merged'])
+        colors = classify(merged_df, {'nat_gas_price': scenario['gas_threshold'],
+                                      'elec_price': scenario['elec_threshold']})
+        data = category_traces(merged_df, colors)
+        title = (f"Green: High-Cost State (Gas > ${scenario['gas_threshold']:g}/MWh or "
+                 f"Electricity > ${scenario['elec_threshold']:g}/MWh)<br>"
+                 f" Red: Low-Cost State (Both <= Threshold), {scenario['start']} to {scenario['end']}")
+    if scenario['labels']:
+        data = list(data) + window['labels']
+    fig = go.Figure(data=data, layout=shared['layout'])
+    fig.update_layout(title={'text': title, 'x': 0.5, 'xanchor': 'center'})
+    return fig
+
+
+def write_figure(fig, path, fmt):
+    if fmt == 'html':
+        fig.write_html(path, include_plotlyjs='cdn')
+    elif fmt == 'json':
+        fig.write_json(path)
+    else:
+        fig.write_image(path, format=fmt)
+
+
+def render_scenario(scenario, out_dir, fmt):
+    name = scenario_name(scenario)
+    path = os.path.join(out_dir, f'{name}.{fmt}')
+    with stage('render_scenario', scenario=name, format=fmt):
+        write_figure(build_figure(scenario, _shared), path, fmt)
+    return path
+
+
+def render_all(scenarios, out_dir='exports', fmt='html', workers=None):
+    """Render every scenario; returns the written paths in scenario order."""
+    scenarios = [normalize_scenario(s) for s in scenarios]
+    os.makedirs(out_dir, exist_ok=True)
+    shared = build_shared(scenarios)
+    if workers == 1:
+        _init_worker(shared)
+        return [render_scenario(s, out_dir, fmt) for s in scenarios]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as pool:
+        return list(pool.map(render_scenario, scenarios, itertools.repeat(out_dir), itertools.repeat(fmt),
+                             chunksize=max(1, len(scenarios) // (4 * (workers or os.cpu_count() or 1)))))
+
+
+# --- Scenario lists ---
+def load_scenarios(path):
+    if path.endswith('.csv'):
+        return pd.read_csv(path).to_dict('records')
+    with open(path) as f:
+        return json.load(f)
+
+
+def grid_scenarios(views, windows, gas_thresholds, elec_thresholds):
+    scenarios = []
+    for view, (start, end) in itertools.product(views, windows):
+        if view == 'price':
+            scenarios.append({'view': view, 'start': start, 'end': end})
+            continue
+        for gas, elec in itertools.product(gas_thresholds, elec_thresholds):
+            scenarios.append({'view': view, 'start': start, 'end': end,
+                              'gas_threshold': gas, 'elec_threshold': elec})
+    return scenarios
+
+
+if __name__ == '__main__':
+    from cli import main
+
+    sys.exit(main(['export'] + sys.argv[1:]))
@@ -0,0 +1,270 @@
+"""Stage-by-stage benchmark of the shipped load -> aggregate -> classify -> render path.
+
+Every stage calls the same functions the apps and scripts use, and cached
+stages start cold: data_loader.clear_cache() runs before each repeat (outside
+the timing), so a stage includes its snapshot read but not earlier stages'
+in-process results. Times are the best and median of --repeat runs.
+
+The bundled workbooks are timed end to end: Excel parse (schema-validated
+readers), state mapping (resolving the gas header's columns to state codes),
+snapshot load, date filter, gas window means, electricity averages, the
+merge, the feature table (built and loaded), classification, figure
+construction (batch_render's category figure) and figure JSON.
+
+The shipped pipeline has no separate date-filter step: window_means finds the
+window in the cumulative sums table with two binary searches and subtracts
+two rows. The date_filter stage times that call on an already loaded table;
+gas_prices times it together with the cold table read.
+
+Synthetic inputs scale the monthly history 10x/100x/1000x at state (51
+columns) and county (~3,100 columns) granularity. They are written as
+snapshots into a temporary directory, so the same pipeline loaders read them;
+Excel parsing is only timed on the bundled files. Figures take one row per
+state whatever the history length and no county map ships, so figure stages
+run on the bundled data only. Combinations larger than --max-cells values are
+skipped.
+
+Results are written as JSON; --compare flags stages that got slower than a
+previous results file by more than --tolerance.
+
+Usage:
+    python benchmark.py                                  # bundled + all scales
+    python benchmark.py --scales 1,10 --geographies states --repeat 3
+    python benchmark.py --out bench.json --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from batch_render import build_figure, build_shared, normalize_scenario
+from classify import classify
+from data_loader import clear_cache
+from features import build_features, load_features
+from figure_cache import serialize
+from pipeline import load_elec_prices, load_gas_cumulative, load_gas_prices, load_merged_prices, window_means
+from schema import read_header, resolve
+from snapshot import ELEC_SERIES, GAS_SCHEMA, GAS_SERIES, load_snapshot, read_elec_excel, read_gas_excel
+from states import STATE_ABBREV
+
+COUNTIES_PER_STATE = 61  # ~3,100 columns, roughly the number of US counties
+START, END = '2020-01-01', '2025-12-31'
+THRESHOLDS = {'nat_gas_price': 30.0, 'elec_price': 105.0}
+
+
+def time_stage(fn, repeat, cold=True):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if cold:
+            clear_cache()
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - t0)
+    return result, timings
+
+
+# --- Inputs ---
+def synthetic_frames(months, geographies, seed=0):
+    """Long-format gas and electricity frames with random prices, as the readers return them."""
+    rng = np.random.default_rng(seed)
+    codes = list(STATE_ABBREV.values())
+    if geographies != 'states':
+        # County-like codes: only the number of columns matters to the loaders
+        codes = [f'{code}{k:02d}' for code in codes for k in range(COUNTIES_PER_STATE)]
+    # Monthly dates ending at the bundled series' last month, so the 2020-2025 window is populated
+    dates = pd.date_range(end='2025-04-15', periods=months, freq='MS') + pd.Timedelta(days=14)
+    gas = pd.DataFrame({
+        'date': np.repeat(dates, len(codes)),
+        'state': np.tile(codes, months),
+        'series': GAS_SERIES,
+        'value': rng.lognormal(mean=1.8, sigma=0.35, size=months * len(codes)),
+    })
+    elec = pd.DataFrame({
+        'date': pd.NaT,
+        'state': np.repeat(codes, 2),
+        'series': ELEC_SERIES,
+        'value': rng.lognormal(mean=2.2, sigma=0.3, size=2 * len(codes)),
+    })
+    return gas, elec
+
+
+@contextmanager
+def synthetic_snapshots(gas, elec):
+    """Snapshots for synthetic frames in a temporary SNAPSHOT_DIR; yields (gas_path, elec_path).
+
+    The paths are empty stand-in source files the snapshots are stamped with,
+    so the pipeline loaders treat the snapshots as fresh.
+    """
+    saved = snapshot.SNAPSHOT_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot.SNAPSHOT_DIR = tmp
+        try:
+            paths = os.path.join(tmp, 'gas.src'), os.path.join(tmp, 'elec.src')
+            for name, long_df, path in zip(('gas', 'elec'), (gas, elec), paths):
+                open(path, 'w').close()
+                snapshot.write_snapshot(name, long_df, path)
+            snapshot.write_cumulative('gas', snapshot.build_cumulative(load_snapshot('gas', paths[0])), paths[0])
+            yield paths
+        finally:
+            snapshot.SNAPSHOT_DIR = saved
+            clear_cache()
+
+
+# --- Stages ---
+def price_stages(gas_path=snapshot.GAS_FILE, elec_path=snapshot.ELEC_FILE):
+    """(name, fn) pairs for the pipeline loaders; each fn stores its result in ctx."""
+    ctx = {}
+    cumulative = load_gas_cumulative(gas_path)
+
+    def date_filter():
+        return window_means(cumulative, START, END)
+
+    def gas_prices():
+        return load_gas_prices(START, END, file_path=gas_path)
+
+    def elec_prices():
+        return load_elec_prices(file_path=elec_path)
+
+    def merged_prices():
+        ctx['merged'] = load_merged_prices(START, END, gas_path, elec_path)
+        return ctx['merged']
+
+    def classification():
+        return classify(ctx['merged'], THRESHOLDS)
+
+    return ctx, [(fn.__name__, fn) for fn in (date_filter, gas_prices, elec_prices, merged_prices,
+                                                 classification)]
+
+
+def bundled_stages():
+    ctx, stages = price_stages()
+    scenario = normalize_scenario({'start': START, 'end': END})
+    header = read_header(GAS_SCHEMA, snapshot.GAS_FILE)
+
+    def state_mapping():
+        return resolve(GAS_SCHEMA, header, snapshot.GAS_FILE)
+
+    def features_build():
+        return build_features(START, END)
+
+    def features_load():
+        return load_features(START, END)
+
+    def figure_construction():
+        ctx['fig'] = build_figure(scenario, build_shared([scenario]))
+        return ctx['fig']
+
+    def figure_json():
+        return serialize(ctx['fig'])
+
+    return [
+        ('excel_parse_gas', read_gas_excel),
+        ('excel_parse_elec', read_elec_excel),
+        ('state_mapping', state_mapping),
+        ('snapshot_load_gas', lambda: load_snapshot('gas')),
+    ] + stages + [(fn.__name__, fn) for fn in (features_build, features_load, figure_construction, figure_json)]
+
+
+def run_dataset(label, meta, stages, repeat):
+    rows = []
+    meta = dict(meta, dataset=label)
+    for name, fn in stages:
+        result, timings = time_stage(fn, repeat)
+        row = dict(meta, stage=name, repeat=repeat, best_s=min(timings), median_s=statistics.median(timings))
+        if name == 'figure_json':
+            row['payload_bytes'] = len(result)
+        rows.append(row)
+        print(f"{label:<24} {name:<20} best {row['best_s'] * 1000:9.2f} ms  median {row['median_s'] * 1000:9.2f} ms")
+    return rows
+
+
+def run(scales, geographies, repeat, max_cells):
+    results = []
+    gas = load_snapshot('gas')  # also makes sure the snapshots exist before timing their loads
+    load_features(START, END)
+    base_months = gas['date'].nunique()
+    meta = {'rows': base_months, 'columns': gas['state'].nunique()}
+    results += run_dataset('bundled', meta, bundled_stages(), repeat)
+    for geography in geographies:
+        for scale in scales:
+            months = base_months * scale
+            n_cols = len(STATE_ABBREV) * (1 if geography == 'states' else COUNTIES_PER_STATE)
+            label = f'synthetic-{geography}-{scale}x'
+            if months * n_cols > max_cells:
+                print(f'{label:<24} skipped ({months} x {n_cols} exceeds --max-cells)')
+                results.append({'dataset': label, 'rows': months, 'columns': n_cols, 'skipped': True})
+                continue
+            gas, elec = synthetic_frames(months, geography)
+            with synthetic_snapshots(gas, elec) as (gas_path, elec_path):
+                def snapshot_write_gas():
+                    snapshot.write_snapshot('gas', gas, gas_path)
+                    snapshot.write_cumulative('gas', snapshot.build_cumulative(gas), gas_path)
+
+                def snapshot_load_gas():
+                    return load_snapshot('gas', gas_path)
+
+                _, stages = price_stages(gas_path, elec_path)
+                stages = [(fn.__name__, fn) for fn in (snapshot_write_gas, snapshot_load_gas)] + stages
+                results += run_dataset(label, {'rows': months, 'columns': n_cols}, stages, repeat)
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Stages slower than the baseline by more than tolerance (a fraction)."""
+    with open(baseline_path) as f:
+        baseline = {(r['dataset'], r['stage']): r for r in json.load(f)['results'] if 'stage' in r}
+    regressions = []
+    for r in results:
+        old = baseline.get((r['dataset'], r.get('stage')))
+        if old and r['best_s'] > old['best_s'] * (1 + tolerance):
+            regressions.append({'dataset': r['dataset'], 'stage': r['stage'],
+                                'baseline_s': old['best_s'], 'current_s': r['best_s']})
+    return regressions
+
+
+def _ints(text):
+    return [int(v) for v in text.split(',') if v]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time each pipeline stage on bundled and synthetic data.')
+    parser.add_argument('--scales', default='1,10,100,1000', help='synthetic row multipliers (default: 1,10,100,1000)')
+    parser.add_argument('--geographies', default='states,counties', help='states and/or counties')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-cells', type=int, default=50_000_000, help='skip synthetic inputs larger than this')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs --compare (default: 0.25)')
+    args = parser.parse_args()
+
+    results = run(_ints(args.scales), args.geographies.split(','), args.repeat, args.max_cells)
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    if args.compare:
+        report['regressions'] = compare(results, args.compare, args.tolerance)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {args.out}')
+    if report.get('regressions'):
+        for r in report['regressions']:
+            print(f"REGRESSION {r['dataset']} {r['stage']}: {r['baseline_s'] * 1000:.2f} -> {r['current_s'] * 1000:.2f} ms")
+        sys.exit(1)
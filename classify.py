@@ -0,0 +1,58 @@
+"""Vectorized threshold classification.
+
+A rule set maps a price column to its threshold, e.g.
+{'nat_gas_price': 30, 'elec_price': 105}. A row is 'high' when any of its
+prices is above its threshold, 'low' when all of them are at or below, and
+'other' otherwise (only possible when a price is missing).
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+DEFAULT_LABELS = ('green', 'red', 'gray')
+
+
+def _values(df, rules):
+    return df[list(rules)].to_numpy(dtype=float)
+
+
+@timed('classify')
+def classify(df, rules, labels=DEFAULT_LABELS):
+    """Category label per row of df, as a NumPy array."""
+    high, low, other = labels
+    values = _values(df, rules)
+    thresholds = np.array(list(rules.values()), dtype=float)
+    any_above = (values > thresholds).any(axis=1)
+    all_below = (values <= thresholds).all(axis=1)
+    return np.select([any_above, all_below], [high, low], default=other)
+
+
+def sweep_thresholds(df, grid, labels=DEFAULT_LABELS, chunk_size=4096):
+    """Count rows per category for every combination of thresholds in grid.
+
+    grid maps each rule column to the thresholds to try; the result has one row
+    per combination (in itertools.product order) with the threshold values and
+    one count column per label.
+    """
+    columns = list(grid)
+    combos = np.array(list(itertools.product(*grid.values())), dtype=float).reshape(-1, len(columns))
+    values = _values(df, grid)[None, :, :]  # (1, rows, rules)
+    high_counts, low_counts = [], []
+    # Chunk the combinations so the (combos, rows, rules) masks stay bounded
+    for start in range(0, len(combos), chunk_size):
+        thresholds = combos[start:start + chunk_size, None, :]  # (chunk, 1, rules)
+        any_above = (values > thresholds).any(axis=2)
+        all_below = (values <= thresholds).all(axis=2)
+        high_counts.append(any_above.sum(axis=1))
+        low_counts.append(all_below.sum(axis=1))
+    high_counts = np.concatenate(high_counts) if high_counts else np.zeros(0, dtype=int)
+    low_counts = np.concatenate(low_counts) if low_counts else np.zeros(0, dtype=int)
+    result = pd.DataFrame(combos, columns=columns)
+    high, low, other = labels
+    # Labels may repeat (e.g. missing data counted as low), so accumulate
+    for label, counts in ((high, high_counts), (low, low_counts), (other, len(df) - high_counts - low_counts)):
+        result[label] = result[label] + counts if label in result else counts
+    return result
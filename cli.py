@@ -0,0 +1,196 @@
+"""Command-line entry point: price summaries, single maps, rankings and batch exports.
+
+    python cli.py summary [--start 2020-01-01 --end 2025-12-31 --units MWh]
+    python cli.py stats --stats mean,p90,winter_summer_ratio,trailing_12m_change
+    python cli.py stats --series yoy --months 24
+    python cli.py map --view category --gas-threshold 30 --elec-threshold 105 [--out map.html]
+    python cli.py map --view animated --out animation.html
+    python cli.py sensitivity --draws 200 --out stability.html
+    python cli.py rank --weights gas_price=0.5,elec_price=0.5 -k 5
+    python cli.py export --views price,category --gas-thresholds 20,30,40 --format png
+
+Plotly is only imported by the map and export commands (and sensitivity --out),
+and summary reads the gas prices from the columnar snapshot (see snapshot.py),
+so the summary path starts without loading any plotting code or parsing a
+workbook.
+"""
+import argparse
+import json
+import os
+import sys
+
+from instrumentation import configure_logging
+from pipeline import DEFAULT_END, DEFAULT_START, GAS_UNIT_FACTORS
+from summary import HIGH_CUT, gas_price_summary
+
+
+# --- Commands ---
+def cmd_summary(args):
+    result = gas_price_summary(args.start, args.end, args.units, args.high_cut)
+    print(result.to_json(indent=2) if args.json else result.format())
+
+
+def cmd_stats(args):
+    from aggregate import DEFAULT_STATS, rolling_mean, state_stats, yoy_change
+
+    try:
+        if args.series == 'rolling':
+            table = rolling_mean(args.window, args.units).iloc[-args.months:]
+        elif args.series == 'yoy':
+            table = yoy_change(args.units).iloc[-args.months:]
+        else:
+            stats = [s.strip() for s in args.stats.split(',') if s.strip()] if args.stats else DEFAULT_STATS
+            table = state_stats(stats, args.start, args.end, args.units)
+    except ValueError as e:
+        sys.exit(f'stats: {e}')
+    if args.json:
+        print(table.to_json(orient='index', indent=2))
+    else:
+        print(table.to_string(float_format=lambda v: f'{v:.3f}'))
+
+
+def cmd_map(args):
+    from batch_render import build_figure, build_shared, normalize_scenario, write_figure
+
+    if args.view == 'animated':
+        from animation import animation_figure
+        fig = animation_figure(args.start, args.end)
+    else:
+        scenario = normalize_scenario({
+            'view': args.view, 'start': args.start, 'end': args.end, 'labels': not args.no_labels,
+            'gas_threshold': args.gas_threshold, 'elec_threshold': args.elec_threshold,
+        })
+        fig = build_figure(scenario, build_shared([scenario]))
+    if args.out:
+        write_figure(fig, args.out, os.path.splitext(args.out)[1].lstrip('.') or 'html')
+        print(f'Wrote {args.out}')
+    else:
+        fig.show()
+
+
+def cmd_sensitivity(args):
+    from sensitivity import run_sensitivity
+
+    result = run_sensitivity(draws=args.draws, seed=args.seed, start=args.start, end=args.end)
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        table = result.table().sort_values(f'{args.kind}_stability')
+        draws = f' x {args.draws} gas price draws' if args.draws else ''
+        print(f'{result.scenarios:,} scenarios ({result.scenarios // max(args.draws, 1)} parameter combinations{draws})')
+        print(table.to_string(float_format=lambda v: f'{v:.2f}'))
+    if args.out:
+        from batch_render import write_figure
+        write_figure(result.stability_heatmap(args.kind), args.out,
+                     os.path.splitext(args.out)[1].lstrip('.') or 'html')
+        print(f'Wrote {args.out}')
+
+
+def cmd_rank(args):
+    from scoring import DEFAULT_WEIGHTS, ScoringEngine, state_candidates
+
+    weights = dict(DEFAULT_WEIGHTS)
+    try:
+        for item in filter(None, args.weights.split(',')):
+            name, _, value = item.partition('=')
+            weights[name.strip()] = float(value)
+        ranked = ScoringEngine(state_candidates(args.start, args.end)).rank(weights, args.k)
+    except ValueError as e:
+        sys.exit(f'rank: {e}')
+    if args.json:
+        print(ranked.to_json(orient='records', indent=2))
+    else:
+        print(ranked.drop(columns=['lat', 'lon']).to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+
+
+def cmd_export(args):
+    from batch_render import grid_scenarios, load_scenarios, render_all
+
+    if args.scenarios:
+        scenarios = load_scenarios(args.scenarios)
+    else:
+        windows = [tuple(w.split(':', 1)) for w in args.windows.split(',') if w]
+        scenarios = grid_scenarios(args.views.split(','), windows,
+                                   _floats(args.gas_thresholds), _floats(args.elec_thresholds))
+    paths = render_all(scenarios, args.out, args.format, args.workers)
+    print(f'Wrote {len(paths)} file(s) to {args.out}')
+
+
+def _floats(text):
+    return [float(v) for v in text.split(',') if v]
+
+
+def build_parser():
+    # Option defaults mirror batch_render; they are spelled out here so building
+    # the parser does not import it (and plotly with it).
+    parser = argparse.ArgumentParser(description='US natural gas and electricity price tools.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    window = argparse.ArgumentParser(add_help=False)
+    window.add_argument('--start', default=DEFAULT_START)
+    window.add_argument('--end', default=DEFAULT_END)
+
+    summary = commands.add_parser('summary', parents=[window], help='print state gas price percentiles and clusters')
+    summary.add_argument('--units', default='MWh', choices=list(GAS_UNIT_FACTORS))
+    summary.add_argument('--high-cut', type=float, default=HIGH_CUT, help='lower bound of the High cluster')
+    summary.add_argument('--json', action='store_true', help='print the summary as JSON')
+    summary.set_defaults(func=cmd_summary)
+
+    stats = commands.add_parser('stats', parents=[window], help='per-state gas price statistics for a window')
+    stats.add_argument('--stats', help='comma-separated statistics (see aggregate.py; default: a standard set)')
+    stats.add_argument('--series', choices=('rolling', 'yoy'),
+                       help='print a monthly series instead: trailing --window-month mean or year-over-year change')
+    stats.add_argument('--window', type=int, default=12, help='months in the rolling mean (default: 12)')
+    stats.add_argument('--months', type=int, default=12, help='latest months of --series to print (default: 12)')
+    stats.add_argument('--units', default='MWh', choices=list(GAS_UNIT_FACTORS))
+    stats.add_argument('--json', action='store_true', help='print the table as JSON')
+    stats.set_defaults(func=cmd_stats)
+
+    map_ = commands.add_parser('map', parents=[window], help='build one map and show or write it')
+    map_.add_argument('--view', default='category', choices=('price', 'category', 'animated'),
+                      help='animated: monthly gas prices with a month slider')
+    map_.add_argument('--gas-threshold', type=float, default=30.0, help='$/MWh (category view)')
+    map_.add_argument('--elec-threshold', type=float, default=105.0, help='$/MWh (category view)')
+    map_.add_argument('--no-labels', action='store_true', help='omit state price labels')
+    map_.add_argument('--out', help='write to this file (.html, .json, .png, .svg, .pdf) instead of showing it')
+    map_.set_defaults(func=cmd_map)
+
+    sensitivity = commands.add_parser('sensitivity', parents=[window],
+                                      help='category stability per state across parameter ranges and price draws')
+    sensitivity.add_argument('--draws', type=int, default=100, help='Monte Carlo gas price draws (0: grid only)')
+    sensitivity.add_argument('--seed', type=int, default=0)
+    sensitivity.add_argument('--kind', default='threshold', choices=('threshold', 'cluster'),
+                             help='categorization to sort by and plot')
+    sensitivity.add_argument('--json', action='store_true', help='print the per-state results as JSON')
+    sensitivity.add_argument('--out', help='write the stability heatmap to this file')
+    sensitivity.set_defaults(func=cmd_sensitivity)
+
+    rank = commands.add_parser('rank', parents=[window], help='rank states by a weighted energy cost score')
+    rank.add_argument('--weights', default='',
+                      help='criterion=weight pairs, e.g. gas_price=1,elec_price=1,site_density=0,site_distance=0.5 '
+                           '(unlisted criteria keep their defaults)')
+    rank.add_argument('-k', type=int, default=10, help='number of states to list')
+    rank.add_argument('--json', action='store_true', help='print the ranking as JSON')
+    rank.set_defaults(func=cmd_rank)
+
+    export = commands.add_parser('export', help='render many map scenarios (see batch_render.py)')
+    export.add_argument('scenarios', nargs='?', help='JSON or CSV scenario list (omit to use the grid options)')
+    export.add_argument('--out', default='exports', help='output directory (default: exports)')
+    export.add_argument('--format', default='html', choices=('html', 'json', 'png', 'svg', 'pdf'))
+    export.add_argument('--workers', type=int, default=None, help='process pool size (default: CPU count)')
+    export.add_argument('--views', default='category', help='grid: comma-separated views')
+    export.add_argument('--windows', default=f'{DEFAULT_START}:{DEFAULT_END}', help='grid: start:end windows')
+    export.add_argument('--gas-thresholds', default='30', help='grid: $/MWh values')
+    export.add_argument('--elec-thresholds', default='105', help='grid: $/MWh values')
+    export.set_defaults(func=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import contextlib
+import os
+import threading
+from collections import OrderedDict
+
+# Parsed frames, keyed on (loader name, path, mtime, size). A workbook is parsed
+# once per process and re-parsed only when the file on disk changes. The loaders
+# that use this cache live in pipeline.py. Names with arguments in them (one per
+# date window, statistic, ...) are unbounded in number, so past MAX_ENTRIES the
+# least recently used entry is dropped.
+MAX_ENTRIES = 512
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_local = threading.local()
+
+
+def _counters():
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    return _local.counters
+
+
+def _count(event):
+    cache_stats[event] += 1
+    for counter in _counters():
+        counter[event] += 1
+
+
+@contextlib.contextmanager
+def counting():
+    """Count cache hits/misses/evictions made inside the block on this thread.
+
+    cache_stats covers the whole process (every session of a shared app);
+    this is the per-rerun view.
+    """
+    counter = {'hits': 0, 'misses': 0, 'evictions': 0}
+    _counters().append(counter)
+    try:
+        yield counter
+    finally:
+        _counters().remove(counter)
+
+
+def file_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _key(name, paths):
+    return (name,) + tuple(file_key(p) for p in paths)
+
+
+def cache_get(name, paths):
+    """Cached value for name if the files in `paths` are unchanged, else None."""
+    key = _key(name, paths)
+    with _cache_lock:
+        if key in _cache:
+            _count('hits')
+            _cache.move_to_end(key)
+            return _cache[key].copy()
+    return None
+
+
+def cache_put(name, paths, value):
+    key = _key(name, paths)
+    with _cache_lock:
+        _count('misses')
+        # Drop entries for older versions of the same files
+        for old in [k for k in _cache if k[0] == name]:
+            del _cache[old]
+        _cache[key] = value
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+            _count('evictions')
+    return value.copy()
+
+
+def cached(name, paths, build):
+    """Return build() from the cache, rebuilding when any of `paths` changed."""
+    value = cache_get(name, paths)
+    if value is None:
+        value = cache_put(name, paths, build())
+    return value
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
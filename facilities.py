@@ -0,0 +1,203 @@
+"""Facility-level data model and a grid spatial index over facility coordinates.
+
+A facility table has one row per site with columns
+
+    facility_id, name, lat, lon, state, county, weight
+
+county is optional (empty when the source has none) and weight is the number
+of companies/sites the row stands for (1 for an individual facility). When no
+facility file is present, the per-state industrial counts are used as a
+stand-in: one row per state at its centroid, weighted by the state count, so
+the same queries and layers work at state granularity.
+
+GridIndex buckets points into fixed lat/lon cells (sorted by cell key), so a
+radius query only looks at the cells overlapping the query's bounding box and
+then filters those candidates by great-circle distance. Per-cell counts feed
+the aggregated map layer in render.py. Longitudes do not wrap at +/-180.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import cached
+from pipeline import load_industrial_counts
+from snapshot import INDUSTRIAL_COUNT_COL, INDUSTRIAL_FILE
+from states import STATE_CENTROIDS
+
+FACILITY_FILE = 'facilities.csv'
+FACILITY_COLUMNS = ['facility_id', 'name', 'lat', 'lon', 'state', 'county', 'weight']
+DEFAULT_CELL_DEG = 0.5
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+# Accepted source column names (lower-cased) for each model column
+_ALIASES = {
+    'facility_id': ('facility_id', 'id', 'site_id', 'plant_id'),
+    'name': ('name', 'facility', 'facility_name', 'site_name', 'plant_name', 'company'),
+    'lat': ('lat', 'latitude'),
+    'lon': ('lon', 'lng', 'long', 'longitude'),
+    'state': ('state', 'state_code'),
+    'county': ('county', 'county_fips', 'fips'),
+    'weight': ('weight', 'count', 'companies'),
+}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments broadcast."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_km(lat, lon, site_lat, site_lon, chunk_size=1024):
+    """Distance from each point to the nearest site, in km (inf when there are no sites)."""
+    lat, lon = np.atleast_1d(np.asarray(lat, dtype=float)), np.atleast_1d(np.asarray(lon, dtype=float))
+    result = np.full(len(lat), np.inf)
+    if len(site_lat):
+        # (chunk x sites) distance blocks keep memory bounded for many points
+        for lo in range(0, len(lat), chunk_size):
+            block = haversine_km(lat[lo:lo + chunk_size, None], lon[lo:lo + chunk_size, None],
+                                 np.asarray(site_lat)[None, :], np.asarray(site_lon)[None, :])
+            result[lo:lo + chunk_size] = block.min(axis=1)
+    return result
+
+
+# --- Data model ---
+def normalize_facilities(raw):
+    """Map a raw table onto FACILITY_COLUMNS; lat/lon are required."""
+    lookup = {str(c).strip().lower(): c for c in raw.columns}
+    columns = {}
+    for name, aliases in _ALIASES.items():
+        source = next((lookup[a] for a in aliases if a in lookup), None)
+        if source is not None:
+            columns[name] = raw[source]
+    missing = [c for c in ('lat', 'lon') if c not in columns]
+    if missing:
+        raise ValueError(f'Facility data has no {"/".join(missing)} column; got {", ".join(map(str, raw.columns))}')
+    df = pd.DataFrame(columns, index=raw.index)
+    df['lat'] = pd.to_numeric(df['lat'], errors='coerce')
+    df['lon'] = pd.to_numeric(df['lon'], errors='coerce')
+    df = df.dropna(subset=['lat', 'lon']).reset_index(drop=True)
+    if 'facility_id' not in df:
+        df['facility_id'] = np.arange(len(df))
+    df['weight'] = pd.to_numeric(df['weight'], errors='coerce').fillna(1) if 'weight' in df else 1.0
+    for col in ('name', 'state', 'county'):
+        df[col] = df[col].astype(str) if col in df else ''
+    df['state'] = df['state'].astype('category')
+    df['county'] = df['county'].astype('category')
+    return df[FACILITY_COLUMNS]
+
+
+def read_facilities(file_path=FACILITY_FILE):
+    raw = pd.read_csv(file_path) if file_path.endswith('.csv') else pd.read_excel(file_path)
+    return normalize_facilities(raw)
+
+
+def facilities_from_state_counts(industrial_df):
+    """State-granularity stand-in: one row per state at its centroid, weighted by its count."""
+    industrial_df = industrial_df[(industrial_df[INDUSTRIAL_COUNT_COL] > 0)
+                                  & industrial_df['State'].isin(STATE_CENTROIDS)]
+    states = industrial_df['State'].to_numpy()
+    lat_lon = np.array([STATE_CENTROIDS[s] for s in states], dtype=float).reshape(-1, 2)
+    return normalize_facilities(pd.DataFrame({
+        'name': states,
+        'lat': lat_lon[:, 0],
+        'lon': lat_lon[:, 1],
+        'state': states,
+        'weight': industrial_df[INDUSTRIAL_COUNT_COL].to_numpy(dtype=float),
+    }))
+
+
+def load_facilities(file_path=FACILITY_FILE):
+    """Facility table from file_path, or the per-state stand-in when that file does not exist."""
+    if os.path.exists(file_path):
+        return cached('facilities', [file_path], lambda: read_facilities(file_path))
+    return cached('facilities_by_state', [INDUSTRIAL_FILE],
+                  lambda: facilities_from_state_counts(load_industrial_counts()))
+
+
+def region_counts(facilities, level='state'):
+    """Facility rows and summed weight per region ('state' or 'county')."""
+    grouped = facilities.groupby(level, observed=True)['weight']
+    return pd.DataFrame({'facilities': grouped.size(), 'weight': grouped.sum()}).sort_values('weight', ascending=False)
+
+
+# --- Spatial index ---
+class GridIndex:
+    """Fixed-size lat/lon cell buckets over a set of points."""
+
+    def __init__(self, lat, lon, cell_deg=DEFAULT_CELL_DEG):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.cell_deg = float(cell_deg)
+        self._ncols = int(np.ceil(360 / self.cell_deg)) + 1
+        keys = self._key(*self._cell(self.lat, self.lon))
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+
+    @classmethod
+    def from_facilities(cls, facilities, cell_deg=DEFAULT_CELL_DEG):
+        return cls(facilities['lat'].to_numpy(), facilities['lon'].to_numpy(), cell_deg)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _cell(self, lat, lon):
+        row = np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64)
+        col = np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64)
+        return row, col
+
+    def _key(self, row, col):
+        return row * self._ncols + col
+
+    def _candidates(self, lat, lon, radius_km):
+        """Point positions in the cells overlapping the query's bounding box."""
+        dlat = radius_km / KM_PER_DEGREE
+        # Widest longitude span is at the bounding box's pole-most latitude
+        edge = min(abs(lat) + dlat, 89.999)
+        dlon = min(dlat / np.cos(np.radians(edge)), 180.0)
+        row0, col0 = self._cell(lat - dlat, lon - dlon)
+        row1, col1 = self._cell(lat + dlat, lon + dlon)
+        rows = np.arange(row0, row1 + 1)
+        # Within one row the cells col0..col1 are a contiguous run of keys
+        lo = np.searchsorted(self._keys, self._key(rows, col0), side='left')
+        hi = np.searchsorted(self._keys, self._key(rows, col1), side='right')
+        return np.concatenate([self._order[a:b] for a, b in zip(lo, hi)])
+
+    def within(self, lat, lon, radius_km):
+        """(positions, distances_km) of points within radius_km of (lat, lon), nearest first."""
+        candidates = self._candidates(lat, lon, radius_km)
+        distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def count_within(self, lat, lon, radius_km, weights=None):
+        positions, _ = self.within(lat, lon, radius_km)
+        return float(np.sum(weights[positions])) if weights is not None else len(positions)
+
+    def cell_counts(self, weights=None):
+        """DataFrame of occupied cells: centre lat/lon, point count and summed weight."""
+        keys, starts, counts = np.unique(self._keys, return_index=True, return_counts=True)
+        sorted_weights = np.ones(len(self._keys)) if weights is None else np.asarray(weights, float)[self._order]
+        weight = np.add.reduceat(sorted_weights, starts) if len(keys) else np.empty(0)
+        rows, cols = np.divmod(keys, self._ncols)
+        return pd.DataFrame({
+            'lat': (rows + 0.5) * self.cell_deg - 90,
+            'lon': (cols + 0.5) * self.cell_deg - 180,
+            'count': counts,
+            'weight': weight,
+        })
+
+
+def facilities_within(facilities, lat, lon, radius_km, index=None):
+    """Facility rows within radius_km of (lat, lon), nearest first, with a distance_km column."""
+    if index is None:
+        index = GridIndex.from_facilities(facilities)
+    positions, distances = index.within(lat, lon, radius_km)
+    result = facilities.iloc[positions].copy()
+    result['distance_km'] = distances
+    return result
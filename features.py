@@ -0,0 +1,202 @@
+"""Per-state feature table joining every source once.
+
+The table holds, for each state abbreviation:
+
+    nat_gas_price         average industrial gas price over the window, $/MWh
+    gas_mmbtu             the same price in $/MMBtu
+    elec_price            average industrial electricity price, $/MWh
+    industrial_companies  companies with industrial/manufacturing sites
+    lat, lon              state centroid
+    spark_spread          elec_price - gas_mmbtu * heat_rate, $/MWh
+    elec_gas_ratio        elec_price / nat_gas_price
+
+Missing values are NaN (e.g. a state absent from the electricity workbook).
+Columns are NumPy arrays sharing one state order, so views read columns
+instead of merging frames. The table is written next to the source snapshots
+at ingest and carries a version string (schema version + source file stamps)
+that changes whenever any source workbook does.
+"""
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import cached, file_key
+from pipeline import DEFAULT_END, DEFAULT_START, load_elec_prices, load_gas_prices, load_industrial_counts
+from snapshot import ELEC_FILE, GAS_FILE, INDUSTRIAL_COUNT_COL, INDUSTRIAL_FILE, SNAPSHOT_DIR, pa
+from states import STATE_CENTROIDS
+
+if pa is not None:
+    import pyarrow.feather as feather
+
+logger = logging.getLogger('natgas.features')
+
+FEATURE_SCHEMA_VERSION = 1
+HEAT_RATE = 7.0  # MMBtu of gas per MWh generated, a typical combined-cycle plant
+SOURCE_FILES = (GAS_FILE, ELEC_FILE, INDUSTRIAL_FILE)
+
+BASE_COLUMNS = ('nat_gas_price', 'gas_mmbtu', 'elec_price', 'industrial_companies', 'lat', 'lon')
+DERIVED_COLUMNS = ('spark_spread', 'elec_gas_ratio')
+FEATURE_COLUMNS = BASE_COLUMNS + DERIVED_COLUMNS
+
+
+class FeatureTable:
+    """Read-only feature columns (float64 arrays) over a fixed state order."""
+
+    def __init__(self, states, columns, version, start=DEFAULT_START, end=DEFAULT_END, heat_rate=HEAT_RATE):
+        self.states = np.asarray(states, dtype=object)
+        self._row = {state: i for i, state in enumerate(self.states)}
+        self._columns = {}
+        for name, values in columns.items():
+            values = np.asarray(values, dtype=float)
+            values.flags.writeable = False
+            self._columns[name] = values
+        self.version = version
+        self.start, self.end, self.heat_rate = start, end, heat_rate
+
+    def copy(self):
+        # Columns are read-only, so cached tables can be shared
+        return self
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, state):
+        return state in self._row
+
+    @property
+    def columns(self):
+        return tuple(self._columns)
+
+    def column(self, name):
+        return self._columns[name]
+
+    def rows(self, states):
+        """Row positions of the given states (KeyError for unknown states)."""
+        return np.array([self._row[s] for s in states], dtype=np.intp)
+
+    def mask(self, *columns):
+        """Rows where every listed column is present."""
+        keep = np.ones(len(self), dtype=bool)
+        for name in columns:
+            keep &= ~np.isnan(self._columns[name])
+        return keep
+
+    def frame(self, columns=FEATURE_COLUMNS, present=()):
+        """DataFrame with a state column plus `columns`, limited to rows where `present` columns are not NaN."""
+        columns = list(columns)
+        rows = np.flatnonzero(self.mask(*present)) if present else slice(None)
+        df = pd.DataFrame({'state': self.states[rows]})
+        for name in columns:
+            df[name] = self._columns[name][rows]
+        return df
+
+    def with_heat_rate(self, heat_rate):
+        """Same table with the spark spread recomputed for another heat rate."""
+        columns = dict(self._columns)
+        columns.update(derive(columns, heat_rate))
+        return FeatureTable(self.states, columns, self.version, self.start, self.end, heat_rate)
+
+
+def derive(columns, heat_rate=HEAT_RATE):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'spark_spread': columns['elec_price'] - columns['gas_mmbtu'] * heat_rate,
+            'elec_gas_ratio': columns['elec_price'] / columns['nat_gas_price'],
+        }
+
+
+def _present(paths):
+    # A missing optional source (industrial counts) changes the version rather than failing
+    return [p for p in paths if os.path.exists(p)]
+
+
+def data_version(paths=SOURCE_FILES):
+    """Schema version plus a short digest of the source files' paths, mtimes and sizes."""
+    stamps = json.dumps([file_key(p) for p in _present(paths)])
+    return f'{FEATURE_SCHEMA_VERSION}:{hashlib.sha1(stamps.encode()).hexdigest()[:12]}'
+
+
+def build_features(start=DEFAULT_START, end=DEFAULT_END, heat_rate=HEAT_RATE):
+    gas = load_gas_prices(start, end, 'MWh').set_index('state')['nat_gas_price']
+    gas_mmbtu = load_gas_prices(start, end, 'MMBtu').set_index('state')['nat_gas_price']
+    elec = load_elec_prices('MWh').set_index('state')['elec_price']
+    try:
+        industrial = load_industrial_counts().set_index('State')[INDUSTRIAL_COUNT_COL]
+    except Exception as e:
+        # Site counts are optional for every view; prices are not
+        logger.warning('industrial counts unavailable, feature table built without them: %s', e)
+        industrial = pd.Series(dtype=float)
+    # Gas workbook order first, then any state only another source knows about
+    states = pd.Index(gas.index).append(pd.Index(elec.index)).append(pd.Index(industrial.index))
+    states = states.append(pd.Index(list(STATE_CENTROIDS))).drop_duplicates()
+    centroids = np.array([STATE_CENTROIDS.get(s, (np.nan, np.nan)) for s in states], dtype=float)
+    columns = {
+        'nat_gas_price': gas.reindex(states).to_numpy(dtype=float),
+        'gas_mmbtu': gas_mmbtu.reindex(states).to_numpy(dtype=float),
+        'elec_price': elec.reindex(states).to_numpy(dtype=float),
+        'industrial_companies': industrial.reindex(states).to_numpy(dtype=float),
+        'lat': centroids[:, 0],
+        'lon': centroids[:, 1],
+    }
+    columns.update(derive(columns, heat_rate))
+    return FeatureTable(states.astype(str), columns, data_version(), start, end, heat_rate)
+
+
+# --- Feature files ---
+def features_path(start=DEFAULT_START, end=DEFAULT_END):
+    return os.path.join(SNAPSHOT_DIR, f'features_{start}_{end}.feather')
+
+
+def write_features(table):
+    df = table.frame()
+    arrow = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata({
+        b'version': table.version.encode(),
+        b'heat_rate': repr(table.heat_rate).encode(),
+    })
+    path = features_path(table.start, table.end)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    feather.write_feather(arrow, path + '.tmp', compression='uncompressed')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def _read_features(start, end):
+    """Stored table for the window if it matches the current source version, else None."""
+    path = features_path(start, end)
+    if pa is None or not os.path.exists(path):
+        return None
+    arrow = feather.read_table(path, memory_map=True)
+    metadata = arrow.schema.metadata or {}
+    if metadata.get(b'version', b'').decode() != data_version():
+        return None
+    columns = {name: arrow.column(name).to_numpy() for name in FEATURE_COLUMNS}
+    return FeatureTable(arrow.column('state').to_pylist(), columns, metadata[b'version'].decode(), start, end,
+                        float(metadata[b'heat_rate']))
+
+
+def ingest_features(start=DEFAULT_START, end=DEFAULT_END, force=False):
+    """Rebuild the stored feature table if a source changed; returns a status string."""
+    if not force and _read_features(start, end) is not None:
+        return 'up to date'
+    write_features(build_features(start, end))
+    return 'built'
+
+
+def load_features(start=DEFAULT_START, end=DEFAULT_END, heat_rate=HEAT_RATE):
+    """FeatureTable for a window, from the stored file when it is current."""
+    def build():
+        table = _read_features(start, end)
+        if table is None:
+            table = build_features(start, end)
+            if pa is not None:
+                try:
+                    write_features(table)
+                except OSError:
+                    pass  # read-only checkout: keep the in-memory table
+        return table if table.heat_rate == heat_rate else table.with_heat_rate(heat_rate)
+
+    return cached(('features', start, end, heat_rate), _present(SOURCE_FILES), build)
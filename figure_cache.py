@@ -0,0 +1,157 @@
+"""Process-wide cache of serialized figures, shared by every app session.
+
+Entries are keyed on the data version plus the view options that produced the
+figure (view name, thresholds, ...), and hold the figure as compact JSON
+bytes. A hit skips building and serializing the figure; the app still parses
+the bytes and hands them to st.plotly_chart, which validates the figure again
+(about 10 ms for the category map) but draws it with the plotly.js Streamlit
+bundles and updates the chart in place. The memory tier is an LRU bounded by
+total bytes.
+An optional disk tier keeps every entry under snapshots/figures/, so a
+restarted server or another worker process serves the same scenarios without
+rebuilding; entries for older data versions are removed when a new version is
+first written.
+
+    NATGAS_FIGURE_CACHE_MB   memory bound in MB (default 64)
+    NATGAS_FIGURE_CACHE_DIR  disk tier directory; empty disables it
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from snapshot import SNAPSHOT_DIR
+
+DEFAULT_MAX_MB = 64
+FIGURE_CACHE_DIR = os.path.join(SNAPSHOT_DIR, 'figures')
+
+
+def serialize(fig):
+    """Compact JSON bytes for a go.Figure or a plain figure dict."""
+    from plotly.utils import PlotlyJSONEncoder
+
+    data = fig if isinstance(fig, dict) else fig.to_plotly_json()
+    return json.dumps(data, cls=PlotlyJSONEncoder, separators=(',', ':')).encode()
+
+
+def figure_key(version, **options):
+    """Cache key for a data version and view options (any JSON-able values)."""
+    options = json.dumps(options, sort_keys=True, separators=(',', ':'))
+    return f"{version.replace(':', '-')}_{hashlib.sha1(options.encode()).hexdigest()[:16]}"
+
+
+class FigureCache:
+    """LRU of serialized figures bounded by total bytes, with an optional disk tier."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 2**20, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._versions = set()  # data versions already written to disk by this process
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    @classmethod
+    def from_env(cls):
+        max_mb = float(os.environ.get('NATGAS_FIGURE_CACHE_MB') or DEFAULT_MAX_MB)
+        disk_dir = os.environ.get('NATGAS_FIGURE_CACHE_DIR', FIGURE_CACHE_DIR) or None
+        return cls(int(max_mb * 2**20), disk_dir)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key + '.json')
+
+    def _store(self, key, payload):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            if len(payload) > self.max_bytes:
+                return
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.stats['evictions'] += 1
+
+    def _write(self, key, payload):
+        version = key.rsplit('_', 1)[0]
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._path(key)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(payload)
+        os.replace(path + '.tmp', path)
+        if version not in self._versions:
+            self._versions.add(version)
+            # Figures built from older data can never be hit again
+            for name in os.listdir(self.disk_dir):
+                if name.endswith('.json') and not name.startswith(version + '_'):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def get(self, key):
+        """Serialized figure for key from memory, then disk; None on a miss."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return payload
+        if self.disk_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as f:
+                    payload = f.read()
+            except OSError:
+                payload = None
+            if payload is not None:
+                self._store(key, payload)
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                return payload
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key, fig):
+        """Serialize and store a figure; returns the bytes."""
+        payload = fig if isinstance(fig, bytes) else serialize(fig)
+        self._store(key, payload)
+        if self.disk_dir:
+            try:
+                self._write(key, payload)
+            except OSError:
+                pass  # read-only checkout: memory tier only
+        return payload
+
+    def get_or_build(self, key, build):
+        """Serialized figure for key, calling build() (a figure) only on a miss."""
+        payload = self.get(key)
+        if payload is None:
+            payload = self.put(key, build())
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def report(self):
+        """Hit rate and memory use, for the debug sidebar and logs."""
+        with self._lock:
+            stats = dict(self.stats)
+            entries, nbytes = len(self._entries), self._bytes
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        return {
+            **stats,
+            'hit_rate': (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0,
+            'entries': entries,
+            'memory_mb': nbytes / 2**20,
+            'max_mb': self.max_bytes / 2**20,
+        }
@@ -0,0 +1,92 @@
+"""Global natural gas benchmarks against domestic state industrial prices.
+
+The World Bank "Pink Sheet" workbook has ~90 commodity columns on its
+'Monthly Prices' sheet. The loader streams that sheet row by row with a
+read-only openpyxl workbook, keeps only the benchmark columns asked for, and
+returns them on pipeline.monthly_index, the index load_gas_monthly uses too, so
+the result joins with the state gas series without reshaping.
+"""
+import numpy as np
+import openpyxl
+import pandas as pd
+import plotly.graph_objects as go
+
+from data_loader import cached
+from pipeline import DEFAULT_END, DEFAULT_START, load_gas_monthly, monthly_index
+
+GLOBAL_FILE = 'Global Commodity Price Data.xlsx'
+GLOBAL_SHEET = 'Monthly Prices'
+CODE_ROW = 7  # 1-based row holding the series codes (NGAS_US, ...); data starts below it
+
+# Series code -> display name. Gas prices are in $/MMBtu.
+GAS_BENCHMARKS = {
+    'NGAS_US': 'Henry Hub (US)',
+    'NGAS_EUR': 'TTF (Europe)',
+    'NGAS_JP': 'LNG (Japan)',
+}
+
+
+def _read_benchmarks(file_path, codes):
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb[GLOBAL_SHEET].iter_rows(min_row=CODE_ROW, values_only=True)
+        header = next(rows)
+        missing = [code for code in codes if code not in header]
+        if missing:
+            raise KeyError(f'{GLOBAL_SHEET!r} has no column(s) {", ".join(missing)}')
+        positions = [header.index(code) for code in codes]
+        periods = []
+        values = []
+        for row in rows:
+            if not row or row[0] is None:
+                continue
+            periods.append(row[0])
+            # Missing observations are written as '…'
+            values.append([row[i] if isinstance(row[i], (int, float)) else np.nan for i in positions])
+    finally:
+        wb.close()
+    # Dates are stored as text like '2025M06'
+    index = monthly_index(pd.to_datetime(pd.Index(periods, dtype=str), format='%YM%m'))
+    return pd.DataFrame(np.array(values, dtype=float).reshape(-1, len(codes)), index=index, columns=list(codes))
+
+
+def load_global_benchmarks(codes=tuple(GAS_BENCHMARKS), file_path=GLOBAL_FILE):
+    """Monthly benchmark prices, one column per series code, on a monthly_index."""
+    codes = tuple(codes)
+    return cached(('global_benchmarks', codes), [file_path], lambda: _read_benchmarks(file_path, codes))
+
+
+def load_state_price_bands(start=DEFAULT_START, end=DEFAULT_END):
+    """Cross-state median and 10th/90th percentile of the monthly industrial gas price, $/MMBtu."""
+    monthly = load_gas_monthly('MMBtu').loc[pd.Timestamp(start):pd.Timestamp(end)]
+    bands = monthly.quantile([0.1, 0.5, 0.9], axis=1).T
+    bands.columns = ['p10', 'median', 'p90']
+    return bands
+
+
+def plot_benchmarks(start=DEFAULT_START, end=DEFAULT_END, codes=tuple(GAS_BENCHMARKS)):
+    bands = load_state_price_bands(start, end)
+    benchmarks = load_global_benchmarks(codes).reindex(bands.index)
+    x = bands.index.to_timestamp()
+
+    fig = go.Figure()
+    # Domestic state spread as a shaded band with the median on top
+    fig.add_trace(go.Scatter(x=x, y=bands['p90'], mode='lines', line=dict(width=0),
+                             showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=x, y=bands['p10'], mode='lines', line=dict(width=0), fill='tonexty',
+                             fillcolor='rgba(128, 128, 128, 0.25)', name='US states, 10th-90th percentile'))
+    fig.add_trace(go.Scatter(x=x, y=bands['median'], mode='lines', line=dict(color='black', width=2),
+                             name='US states, median industrial price'))
+    for code in benchmarks.columns:
+        fig.add_trace(go.Scatter(x=x, y=benchmarks[code], mode='lines', name=GAS_BENCHMARKS.get(code, code)))
+    fig.update_layout(
+        title=f'Global Natural Gas Benchmarks vs US State Industrial Prices ({start[:4]}-{end[:4]}, $/MMBtu)',
+        xaxis_title='Month',
+        yaxis_title='$/MMBtu',
+        hovermode='x unified',
+    )
+    return fig
+
+
+if __name__ == '__main__':
+    plot_benchmarks().show()
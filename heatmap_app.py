@@ -1,174 +1,326 @@
+import json
+import os
+from collections import deque
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
 
+from animation import animation_json
+from classify import classify
+from data_loader import counting
+from facilities import FACILITY_FILE, GridIndex, facilities_within, load_facilities
+from features import SOURCE_FILES, data_version, load_features
+from figure_cache import FigureCache, figure_key
+from instrumentation import profiled, recording, stage, summarize
+from render import BASE_LAYOUT, add_facility_density, add_site_markers, hover_text, score_traces
+from scoring import CRITERIA, DEFAULT_K, DEFAULT_WEIGHTS, DENSITY_RADIUS_KM, ScoringEngine, state_candidates
+from sensitivity import KINDS, run_sensitivity
+from sources import APP_SOURCES, load_sources
+from states import STATE_CENTROIDS
+from summary import gas_price_summary
+from threshold_index import ThresholdIndex
+
 st.set_page_config(layout="wide")
 
 
-# State name to abbreviation mapping
-def get_state_abbrev():
-    return {
-        'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-        'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'District of Columbia': 'DC',
-        'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL',
-        'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA',
-        'Maine': 'ME', 'Maryland': 'MD', 'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN',
-        'Mississippi': 'MS', 'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
-        'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM', 'New York': 'NY',
-        'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR',
-        'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD',
-        'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA',
-        'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'
-    }
+# Green if either price is above its threshold, red otherwise
+APP_LABELS = ('green', 'red', 'red')
+PRICE_COLUMNS = ['nat_gas_price', 'elec_price']
+DEBUG_HISTORY = 20
+MAP_HEIGHT = 700
+CATEGORY_VIEW = 'Price categories'
+ANIMATED_VIEW = 'Monthly gas prices (animated)'
+RANKING_VIEW = 'Site ranking'
+CRITERION_LABELS = {
+    'gas_price': 'Gas price',
+    'elec_price': 'Electricity price',
+    'site_density': 'Nearby industrial sites',
+    'site_distance': 'Distance to nearest site',
+}
+SOURCE_TIMEOUTS = {'gas': 120, 'elec': 60, 'industrial': 30}
+MAP_FILES = SOURCE_FILES + (FACILITY_FILE,)
+
+
+def set_categories(fig, merged_df, colors):
+    """Point the Green/Red choropleth traces (the first two) at the states in each category."""
+    colors = np.asarray(colors)
+    hover = np.array(hover_text(merged_df), dtype=object)
+    for trace, color in zip(fig.data[:2], ['green', 'red']):
+        mask = colors == color
+        trace.update(locations=merged_df['state'].to_numpy()[mask], z=np.ones(mask.sum()),
+                     hovertext=hover[mask])
+
+
+def set_title(fig, nat_gas_threshold, elec_threshold):
+    fig.update_layout(title={
+        'text': (
+            f'Green: High-Cost State (Gas > ${nat_gas_threshold}/MWh or Electricity > ${elec_threshold}/MWh) <br>'
+            f' Red: Low-Cost State (Both < Threshold)'
+        ),
+        'x': 0.5,
+        'xanchor': 'center'
+    })
+
+
+def app_prices():
+    """Gas and electricity prices for states with both, read from the per-state feature table."""
+    return load_features().frame(PRICE_COLUMNS, present=['elec_price'])
+
 
 def plot_map(nat_gas_threshold, elec_threshold):
-    state_abbrev = get_state_abbrev()
-    # --- Natural Gas Data ---
-    file_path = 'Domestic Natural Gas Data.xls'
-    sheet_name = 'Data 1'
-    df = pd.read_excel(file_path, sheet_name=sheet_name, header=2)
-    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
-        df['Date'] = pd.to_datetime(df['Date'])
-    df_2020_2025 = df[(df['Date'] >= '2020-01-01') & (df['Date'] <= '2025-12-31')]
-    state_cols = [col for col in df.columns if col not in ['Date', 'United States Natural Gas Industrial Price (Dollars per Thousand Cubic Feet)']]
-    avg_prices = df_2020_2025[state_cols].mean()
-    state_names = []
-    for col in state_cols:
-        if col.startswith('Nevada Natural Gas Indutrial Price'):
-            state_names.append('Nevada')
-        else:
-            state_names.append(col.replace(' Natural Gas Industrial Price (Dollars per Thousand Cubic Feet)', ''))
-    state_abbrevs = [state_abbrev.get(name, None) for name in state_names]
-    avg_prices_df = pd.DataFrame({'state': state_abbrevs, 'nat_gas_price': avg_prices.values})
-    avg_prices_df = avg_prices_df.dropna(subset=['state'])
-    avg_prices_df['nat_gas_price'] = avg_prices_df['nat_gas_price'] * 3.29
-
-    # --- Electricity Price Data ---
-    elec_df = pd.read_excel('electricity_price_avg.xlsx', header=2)
-    elec_df['elec_price_MWh'] = elec_df['Average Price (cents/kWh)'].astype(float) * 10
-    state_elec_avg = elec_df.groupby('State')['elec_price_MWh'].mean().reset_index()
-    state_elec_avg['state'] = state_elec_avg['State'].map(state_abbrev)
-    state_elec_avg = state_elec_avg.dropna(subset=['state'])
-    merged_df = avg_prices_df.merge(state_elec_avg[['state', 'elec_price_MWh']], on='state', how='inner')
-    merged_df = merged_df.rename(columns={'elec_price_MWh': 'elec_price'})
+    # The feature table is built at ingest (see features.py); a threshold
+    # change only redoes the classification and rendering below.
+    merged_df = app_prices()
 
     # --- Color Assignment ---
-    def assign_color(row):
-        if row['nat_gas_price'] > nat_gas_threshold or row['elec_price'] > elec_threshold:
-            return 'green'
-        else:
-            return 'red'
-    merged_df['color'] = merged_df.apply(assign_color, axis=1)
+    colors = classify(merged_df, {'nat_gas_price': nat_gas_threshold, 'elec_price': elec_threshold},
+                      labels=APP_LABELS)
 
     # --- Plot Map ---
     fig = go.Figure()
     for color in ['green', 'red']:
-        sub = merged_df[merged_df['color'] == color]
         fig.add_trace(go.Choropleth(
-            locations=sub['state'],
-            z=[1]*len(sub),  # dummy value
             locationmode='USA-states',
             colorscale=[[0, color], [1, color]],
             showscale=False,
             marker_line_color='white',
             name=color.capitalize(),
-            hovertext=[f"{row['state']}: Gas ${row['nat_gas_price']:.2f}/MWh, Elec ${row['elec_price']:.2f}/MWh" for i, row in sub.iterrows()],
             hoverinfo='text',
         ))
-    
+    set_categories(fig, merged_df, colors)
+
     # --- Industrial Sites Circles ---
+    # Facility-level data is drawn as grid-cell aggregates rather than one marker per site
     try:
-        industrial_df = pd.read_excel('industrial_sites_rtc_member_data.xlsx')
-        # Filter out states with 0 companies
-        industrial_df = industrial_df[industrial_df['Number of Companies with Industrial/Manufacturing Sites'] > 0]
-        
-        # State centroid coordinates (approximate)
-        state_centroids = {
-            'AL': (32.8, -86.8), 'AK': (64.0, -152.0), 'AZ': (33.7, -111.6), 'AR': (35.2, -92.4),
-            'CA': (36.8, -119.4), 'CO': (39.0, -105.5), 'CT': (41.6, -72.7), 'DE': (38.9, -75.5),
-            'DC': (38.9, -77.0), 'FL': (27.7, -81.5), 'GA': (32.6, -83.4), 'HI': (19.9, -155.6),
-            'ID': (44.4, -114.7), 'IL': (40.0, -89.0), 'IN': (39.8, -86.1), 'IA': (42.0, -93.2),
-            'KS': (38.5, -98.0), 'KY': (37.5, -85.3), 'LA': (31.2, -91.8), 'ME': (44.5, -69.2),
-            'MD': (39.0, -76.7), 'MA': (42.3, -71.8), 'MI': (44.3, -85.6), 'MN': (46.7, -94.7),
-            'MS': (32.7, -89.6), 'MO': (38.5, -92.5), 'MT': (47.0, -110.5), 'NE': (41.5, -99.7),
-            'NV': (39.3, -116.6), 'NH': (43.7, -71.6), 'NJ': (40.1, -74.7), 'NM': (34.5, -106.0),
-            'NY': (43.0, -75.0), 'NC': (35.6, -79.8), 'ND': (47.5, -100.5), 'OH': (40.4, -82.7),
-            'OK': (35.6, -97.1), 'OR': (44.0, -120.6), 'PA': (40.9, -77.8), 'RI': (41.6, -71.5),
-            'SC': (33.9, -80.9), 'SD': (44.3, -100.3), 'TN': (35.7, -86.7), 'TX': (31.5, -100.0),
-            'UT': (39.3, -111.6), 'VT': (44.0, -72.7), 'VA': (37.5, -78.5), 'WA': (47.4, -121.5),
-            'WV': (38.6, -80.9), 'WI': (44.3, -89.6), 'WY': (42.7, -107.2)
-        }
-        
-        # Add circles for industrial sites
-        for _, row in industrial_df.iterrows():
-            state = row['State']
-            num_companies = row['Number of Companies with Industrial/Manufacturing Sites']
-            
-            if state in state_centroids:
-                lat, lon = state_centroids[state]
-                # Scale circle size based on number of companies (min 5, max 20)
-                size = max(5, min(20, 5 + (num_companies * 2)))
-                
-                fig.add_trace(go.Scattergeo(
-                    lon=[lon],
-                    lat=[lat],
-                    mode='markers',
-                    marker=dict(
-                        size=size,
-                        color='blue',
-                        opacity=0.2,
-                        line=dict(width=1, color='darkblue')
-                    ),
-                    name=f'{state}: {num_companies} companies',
-                    showlegend=False,
-                    hovertext=f'{state}: {num_companies} industrial companies',
-                    hoverinfo='text'
-                ))
-        
-        # Add legend circles for scale (positioned off-map)
-        legend_sizes = [5, 20]
-        legend_companies = [1, 15]
-        #legend_lat = 25  # Below the map
-        #legend_lon = -110  # West of the map
-        
-        for i, (size, companies) in enumerate(zip(legend_sizes, legend_companies)):
-            fig.add_trace(go.Scattergeo(
-                lon=[None], 
-                lat=[None],
-                mode='markers',
-                marker=dict(
-                    size=size,
-                    color='blue',
-                    opacity=0.2,
-                    line=dict(width=1, color='darkblue')
-                ),
-                name=f'{companies} industrial sites',
-                showlegend=True,
-                hovertext=f'Legend: {companies} industrial sites',
-                hoverinfo='text'
-            ))
-            
+        if os.path.exists(FACILITY_FILE):
+            add_facility_density(fig, load_facilities())
+        else:
+            features = load_features()
+            counts = features.column('industrial_companies')
+            sites = features.mask('industrial_companies', 'lat') & (counts > 0)
+            add_site_markers(fig, features.states[sites], features.column('lat')[sites],
+                             features.column('lon')[sites], counts[sites])
     except Exception as e:
         st.warning(f"Could not load industrial sites data: {e}")
-    
+
+    set_title(fig, nat_gas_threshold, elec_threshold)
     fig.update_layout(
-        title={
-            'text': (
-                f'Green: High-Cost State (Gas > ${nat_gas_threshold}/MWh or Electricity > ${elec_threshold}/MWh) <br>'
-                f' Red: Low-Cost State (Both < Threshold)'
-            ),
-            'x': 0.5,
-            'xanchor': 'center'
-        },
         geo=dict(scope='usa'),
         legend_title_text='No. of Industrial Sites',
-        height=700
+        height=MAP_HEIGHT
     )
     return fig
 
+
+@st.cache_resource
+def get_facility_index(facilities):
+    return GridIndex.from_facilities(facilities)
+
+
+@st.cache_resource
+def get_figure_cache():
+    # One cache per server process, shared by every session
+    return FigureCache.from_env()
+
+
+@st.cache_resource
+def get_scoring_engine(version):
+    # version is only a cache key: a changed workbook gives a new engine
+    return ScoringEngine(state_candidates())
+
+
+@st.cache_resource
+def get_sensitivity(draws, seed, version):
+    # version is only a cache key: a changed workbook gives a new entry
+    return run_sensitivity(draws=draws, seed=seed)
+
+
+@st.cache_resource
+def get_sensitivity_table(draws, seed, version, kind):
+    return get_sensitivity(draws, seed, version).table().sort_values(f'{kind}_stability').round(3)
+
+
+@st.cache_resource
+def get_threshold_index(merged_df):
+    return ThresholdIndex(merged_df, PRICE_COLUMNS, labels=APP_LABELS)
+
+
+def current_map(nat_gas_threshold, elec_threshold):
+    """Figure for the current thresholds, patched in place from the previous rerun when possible.
+
+    The figure built on the first run is kept in session state. On later runs
+    the threshold index finds the states whose category changed, and only the
+    two choropleth traces are updated (labels, markers and layout are reused).
+    """
+    merged_df = app_prices()
+    index = get_threshold_index(merged_df)
+    thresholds = {'nat_gas_price': nat_gas_threshold, 'elec_price': elec_threshold}
+    view = st.session_state.get('map_view')
+    if view is None or view['index'] is not index:
+        with stage('figure_build'):
+            fig = plot_map(nat_gas_threshold, elec_threshold)
+            colors = index.classify(thresholds)
+    else:
+        fig = view['fig']
+        with stage('threshold_update'):
+            changed, colors = index.update(view['colors'], view['thresholds'], thresholds)
+        with stage('figure_patch'):
+            if len(changed):
+                set_categories(fig, merged_df, colors)
+            set_title(fig, nat_gas_threshold, elec_threshold)
+    st.session_state['map_view'] = {'index': index, 'fig': fig, 'colors': colors, 'thresholds': thresholds}
+    return fig
+
+
+def shared_map(nat_gas_threshold, elec_threshold):
+    """(serialized category map, go.Figure or None), from the cross-session figure cache when possible.
+
+    The figure is returned when this session built or patched it, so it can be
+    shown without parsing the bytes again; on a cache hit it is None.
+    """
+    cache = get_figure_cache()
+    key = figure_key(data_version(MAP_FILES), view='category', nat_gas_threshold=nat_gas_threshold,
+                     elec_threshold=elec_threshold)
+    with stage('figure_cache'):
+        payload = cache.get(key)
+    if payload is not None:
+        return payload, None
+    fig = current_map(nat_gas_threshold, elec_threshold)
+    with stage('figure_serialize'):
+        payload = cache.put(key, fig)
+    return payload, fig
+
+
+def ranking_map(weights, k):
+    """Serialized score map with the top k states outlined, through the figure cache."""
+    version = data_version(MAP_FILES)
+    engine = get_scoring_engine(version)
+    key = figure_key(version, view='ranking', weights=weights, k=k)
+
+    def build():
+        scores = engine.scores(weights)
+        fig = go.Figure(score_traces(engine.candidates, scores, engine.top_k(weights, k, scores)), layout=BASE_LAYOUT)
+        fig.update_layout(title=dict(text=f'Top {k} states by weighted energy cost score', x=0.5, xanchor='center'),
+                          height=MAP_HEIGHT)
+        return fig
+
+    with stage('ranking_map'):
+        return get_figure_cache().get_or_build(key, build)
+
+
 st.title('US Energy Price Analysis')
-nat_gas_threshold = st.number_input('Natural Gas Price Threshold ($/MWh)', min_value=0.0, value=30.0)
-elec_threshold = st.number_input('Electricity Price Threshold ($/MWh)', min_value=0.0, value=105.0)
-fig = plot_map(nat_gas_threshold, elec_threshold)
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+
+# All workbooks are read concurrently; a failed or slow source only disables what depends on it
+with stage('sources'):
+    sources = load_sources(APP_SOURCES, timeouts=SOURCE_TIMEOUTS)
+missing_prices = [name for name in ('gas', 'elec') if name in sources.errors]
+if missing_prices:
+    st.error('Could not load price data: ' + '; '.join(f'{name}: {sources.errors[name]}' for name in missing_prices))
+    st.stop()
+if 'industrial' in sources.errors:
+    st.warning(f"Could not load industrial sites data: {sources.errors['industrial']}")
+
+view = st.radio('Map', [CATEGORY_VIEW, ANIMATED_VIEW, RANKING_VIEW], horizontal=True)
+if view == CATEGORY_VIEW:
+    nat_gas_threshold = st.number_input('Natural Gas Price Threshold ($/MWh)', min_value=0.0, value=30.0)
+    elec_threshold = st.number_input('Electricity Price Threshold ($/MWh)', min_value=0.0, value=105.0)
+elif view == RANKING_VIEW:
+    weights = {name: column.slider(f'{CRITERION_LABELS[name]} weight', min_value=0.0, max_value=1.0,
+                                   value=DEFAULT_WEIGHTS[name], step=0.05)
+               for name, column in zip(CRITERIA, st.columns(len(CRITERIA)))}
+    top_k = st.slider('States to highlight', min_value=1, max_value=25, value=DEFAULT_K)
+
+# --- Debug sidebar: per-stage latency, cache hits/misses, payload size and figure cache use ---
+debug = st.sidebar.checkbox('Debug timings')
+profile = debug and st.sidebar.checkbox('Profile reruns (cProfile)')
+if view == RANKING_VIEW and not sum(weights.values()) > 0:
+    st.warning('Set at least one weight above zero.')
+    st.stop()
+with recording() as records, counting() as cache_counts, profiled(profile) as profile_result:
+    with stage('rerun'):
+        fig = None
+        if view == ANIMATED_VIEW:
+            # Pre-serialized frames, read from disk once per process (see animation.py)
+            with stage('animation_load'):
+                payload = animation_json()
+        elif view == RANKING_VIEW:
+            payload = ranking_map(weights, top_k)
+        else:
+            payload, fig = shared_map(nat_gas_threshold, elec_threshold)
+        if fig is None:
+            with stage('figure_load'):
+                fig = json.loads(payload)
+        with stage('chart_send'):
+            st.plotly_chart(fig, use_container_width=True)
+    if view == RANKING_VIEW:
+        with stage('ranking_table'):
+            ranked = get_scoring_engine(data_version(MAP_FILES)).rank(weights, top_k)
+        st.caption(f'Costs are scaled 0 (best state) to 1 (worst) per criterion; sites within '
+                   f'{DENSITY_RADIUS_KM:g} km count as nearby. Without a facility file, sites are per-state '
+                   f"counts and a state's own are left out. States missing a weighted value are not ranked.")
+        st.dataframe(ranked.drop(columns=['lat', 'lon']).round(3), hide_index=True)
+
+    # --- Gas price summary (same result object the CLI prints) ---
+    with st.expander('State gas price summary'):
+        price_summary = gas_price_summary()
+        for column, (label, value) in zip(st.columns(3), [('Low', price_summary.low), ('Median', price_summary.median),
+                                                            ('High', price_summary.high)]):
+            column.metric(f'{label} ($/MWh)', f'{value:.2f}')
+        for name, states in price_summary.clusters.items():
+            st.write(f"**{name}** ({len(states)}): {', '.join(states)}")
+
+    # --- Sensitivity: how stable is each state's category across parameter ranges and price draws ---
+    with st.expander('Category sensitivity'):
+        draw_column, seed_column, kind_column = st.columns(3)
+        draws = draw_column.number_input('Gas price draws (0: parameter grid only)', min_value=0, max_value=1000,
+                                         value=100, step=50)
+        seed = seed_column.number_input('Seed', min_value=0, value=0)
+        kind = kind_column.radio('Categories', list(KINDS), horizontal=True)
+        version = data_version()
+        with stage('sensitivity', draws=draws):
+            sensitivity = get_sensitivity(int(draws), int(seed), version)
+        st.caption(f'{sensitivity.scenarios:,} scenarios. Columns after the first fix one swept parameter value; '
+                   'electricity prices are held at their averages.')
+        with stage('sensitivity_view', kind=kind):
+            heatmap = get_figure_cache().get_or_build(
+                figure_key(version, view='sensitivity', draws=int(draws), seed=int(seed), kind=kind),
+                lambda: sensitivity.stability_heatmap(kind))
+            st.plotly_chart(json.loads(heatmap), use_container_width=True)
+            st.dataframe(get_sensitivity_table(int(draws), int(seed), version, kind))
+
+    # --- Facility search: sites within a radius of a state centroid ---
+    if os.path.exists(FACILITY_FILE) or 'industrial' in sources:
+        with st.expander('Industrial sites near a state'):
+            center_state = st.selectbox('Centre', sorted(STATE_CENTROIDS))
+            radius_km = st.slider('Radius (km)', min_value=25, max_value=1500, value=300, step=25)
+            with stage('facility_search'):
+                facilities = load_facilities()
+                nearby = facilities_within(facilities, *STATE_CENTROIDS[center_state], radius_km,
+                                           index=get_facility_index(facilities))
+            st.write(f"{nearby['weight'].sum():g} sites ({len(nearby)} facilities) within {radius_km} km "
+                     f"of the {center_state} centroid")
+            st.dataframe(nearby[['name', 'state', 'county', 'weight', 'distance_km']].round({'distance_km': 1}),
+                         hide_index=True)
+
+if debug:
+    history = st.session_state.setdefault('timing_history', deque(maxlen=DEBUG_HISTORY))
+    history.append({
+        'rerun': st.session_state.get('rerun_count', 0),
+        **{f'{name} (ms)': round(ms, 2) for name, ms in summarize(records).items()},
+        'cache hits': cache_counts['hits'],
+        'cache misses': cache_counts['misses'],
+        'payload (KB)': round(len(payload) / 1024, 1),
+    })
+    st.sidebar.subheader(f'Last {len(history)} reruns')
+    st.sidebar.dataframe(pd.DataFrame(list(history)).set_index('rerun').iloc[::-1])
+    figures = get_figure_cache().report()
+    st.sidebar.caption(
+        f"Figure cache (all sessions): {figures['entries']} figures, {figures['memory_mb']:.1f} of "
+        f"{figures['max_mb']:.0f} MB, hit rate {figures['hit_rate']:.0%} ({figures['hits']} memory, "
+        f"{figures['disk_hits']} disk, {figures['misses']} built, {figures['evictions']} evicted)")
+    if profile_result.get('report'):
+        with st.sidebar.expander('cProfile (this rerun)'):
+            st.code(profile_result['report'])
+st.session_state['rerun_count'] = st.session_state.get('rerun_count', 0) + 1
@@ -0,0 +1,116 @@
+"""Stage timing, profiling and structured logging.
+
+Wrap a pipeline stage with `with stage('name'):` or decorate it with
+`@timed('name')`. Every finished stage is logged as one JSON object on the
+'natgas.timing' logger and added to any recording started with `recording()`,
+which is how the Streamlit app collects per-rerun timings for its debug
+sidebar.
+
+CLI scripts call configure_logging(); set NATGAS_LOG=debug to get the stage
+log as JSON lines on stderr. profiled() wraps a block in cProfile.
+"""
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+
+logger = logging.getLogger('natgas.timing')
+_local = threading.local()
+
+
+def _recorders():
+    if not hasattr(_local, 'recorders'):
+        _local.recorders = []
+    return _local.recorders
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """Time the enclosed block as one stage."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        for recorder in _recorders():
+            recorder.append((name, elapsed))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({'event': 'stage', 'stage': name, 'ms': round(elapsed * 1000, 3), **fields}))
+
+
+def timed(name=None):
+    """Decorator form of stage(); defaults to the function's name."""
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def recording():
+    """Collect (stage, seconds) pairs for stages finished inside the block on this thread."""
+    records = []
+    _recorders().append(records)
+    try:
+        yield records
+    finally:
+        _recorders().remove(records)
+
+
+def summarize(records):
+    """Total milliseconds per stage name, in first-seen order."""
+    totals = {}
+    for name, seconds in records:
+        totals[name] = totals.get(name, 0.0) + seconds * 1000
+    return totals
+
+
+@contextlib.contextmanager
+def profiled(enabled=True, sort='cumulative', limit=25):
+    """Run the block under cProfile; the yielded dict gets a 'report' text entry."""
+    result = {}
+    if not enabled:
+        yield result
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+        result['report'] = out.getvalue()
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        message = record.getMessage()
+        if message.startswith('{'):
+            return message
+        return json.dumps({'event': 'log', 'level': record.levelname, 'logger': record.name, 'message': message})
+
+
+def configure_logging(level=None):
+    """Send natgas.* logs to stderr as JSON lines. Level defaults to $NATGAS_LOG (or WARNING)."""
+    level = (level or os.environ.get('NATGAS_LOG') or 'WARNING').upper()
+    root = logging.getLogger('natgas')
+    if not any(getattr(h, '_natgas', False) for h in root.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(_JsonFormatter())
+        handler._natgas = True
+        root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+    return root
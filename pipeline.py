@@ -0,0 +1,148 @@
+"""Shared state-price pipeline used by every visualization.
+
+All loaders return plain DataFrames keyed by state abbreviation and are
+memoized through data_loader.cached, so each (source version, arguments)
+combination is computed once per process no matter how many entry points ask.
+"""
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from data_loader import cached
+from instrumentation import timed
+from snapshot import (
+    ELEC_FILE, ELEC_SERIES, GAS_FILE, GAS_SERIES, INDUSTRIAL_COUNT_COL, INDUSTRIAL_FILE,
+    INDUSTRIAL_SERIES, load_cumulative, load_snapshot,
+)
+
+GasUnits = Literal['kcf', 'MWh', 'MMBtu']
+ElecUnits = Literal['MWh', 'kWh']
+
+# Multipliers from the stored units ($/kcf for gas, cents/kWh for electricity)
+GAS_UNIT_FACTORS = {
+    'kcf': 1.0,
+    'MWh': 3.29,         # 1 kcf ≈ 3.29 MWh (factor used throughout the maps)
+    'MMBtu': 1 / 1.037,  # 1 kcf ≈ 1.037 MMBtu
+}
+ELEC_UNIT_FACTORS = {
+    'MWh': 10.0,   # 1 cent/kWh = $10/MWh
+    'kWh': 0.01,   # cents -> dollars
+}
+
+DEFAULT_START = '2020-01-01'
+DEFAULT_END = '2025-12-31'
+
+
+def _unit_factor(factors, units):
+    try:
+        return factors[units]
+    except KeyError:
+        raise ValueError(f'Unknown units {units!r}; expected one of {", ".join(factors)}') from None
+
+
+def monthly_index(dates) -> pd.PeriodIndex:
+    """Calendar-month PeriodIndex named 'date', the index of every monthly series.
+
+    EIA stamps a month on its 15th and the World Bank writes '2025M06'; both
+    map to the same periods, so monthly series from any source join directly.
+    """
+    return pd.DatetimeIndex(dates).to_period('M').rename('date')
+
+
+# --- Natural Gas Data ---
+@timed()
+def load_gas_monthly(units: GasUnits = 'kcf', file_path: str = GAS_FILE) -> pd.DataFrame:
+    """Monthly industrial gas price, one column per state (US total excluded), on a monthly_index."""
+    factor = _unit_factor(GAS_UNIT_FACTORS, units)
+
+    def build():
+        long_df = load_snapshot('gas', file_path)
+        long_df = long_df[(long_df['series'] == GAS_SERIES) & (long_df['state'] != 'US')]
+        wide = long_df.pivot(index='date', columns='state', values='value')
+        # Keep the workbook's column order (alphabetical by state name)
+        wide = wide[long_df['state'].unique().astype(str)]
+        wide.columns = wide.columns.astype(str)
+        wide.columns.name = None
+        wide.index = monthly_index(wide.index)
+        return wide * factor
+
+    return cached(('gas_monthly', units), [file_path], build)
+
+
+def load_gas_cumulative(file_path: str = GAS_FILE) -> pd.DataFrame:
+    """Running per-state sums/counts of the monthly gas price ($/kcf), see snapshot.build_cumulative."""
+    return cached('gas_cumulative', [file_path], lambda: load_cumulative('gas', file_path))
+
+
+def window_means(cumulative: pd.DataFrame, start: str, end: str) -> pd.Series:
+    """Per-state mean over [start, end] from a cumulative table, O(1) per state."""
+    dates = cumulative.index.to_numpy()
+    sums = cumulative['sum'].to_numpy()
+    counts = cumulative['count'].to_numpy()
+    lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side='left') - 1
+    hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side='right') - 1
+    if hi < 0 or hi <= lo:
+        window_sum = np.zeros(sums.shape[1])
+        window_count = np.zeros(sums.shape[1])
+    else:
+        window_sum = sums[hi] - (sums[lo] if lo >= 0 else 0)
+        window_count = counts[hi] - (counts[lo] if lo >= 0 else 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(window_count > 0, window_sum / window_count, np.nan)
+    return pd.Series(means, index=cumulative['sum'].columns)
+
+
+@timed()
+def load_gas_prices(start: str = DEFAULT_START, end: str = DEFAULT_END, units: GasUnits = 'MWh',
+                    file_path: str = GAS_FILE) -> pd.DataFrame:
+    """Average industrial gas price per state over [start, end] as columns state, nat_gas_price."""
+    factor = _unit_factor(GAS_UNIT_FACTORS, units)
+
+    def build():
+        avg_prices = window_means(load_gas_cumulative(file_path), start, end).drop('US', errors='ignore')
+        return pd.DataFrame({'state': avg_prices.index, 'nat_gas_price': avg_prices.values * factor})
+
+    return cached(('gas_prices', start, end, units), [file_path], build)
+
+
+# --- Electricity Price Data ---
+@timed()
+def load_elec_prices(units: ElecUnits = 'MWh', file_path: str = ELEC_FILE) -> pd.DataFrame:
+    """Average industrial electricity price per state as columns state, elec_price."""
+    factor = _unit_factor(ELEC_UNIT_FACTORS, units)
+
+    def build():
+        long_df = load_snapshot('elec', file_path)
+        long_df = long_df[long_df['series'] == ELEC_SERIES]
+        state_elec_avg = long_df.groupby('state', observed=True)['value'].mean() * factor
+        return pd.DataFrame({'state': state_elec_avg.index.astype(str), 'elec_price': state_elec_avg.values})
+
+    return cached(('elec_prices', units), [file_path], build)
+
+
+# --- Industrial Sites ---
+@timed()
+def load_industrial_counts(file_path: str = INDUSTRIAL_FILE) -> pd.DataFrame:
+    """Number of companies with industrial/manufacturing sites per state."""
+    def build():
+        long_df = load_snapshot('industrial', file_path)
+        long_df = long_df[long_df['series'] == INDUSTRIAL_SERIES]
+        return pd.DataFrame({
+            'State': long_df['state'].astype(str).values,
+            INDUSTRIAL_COUNT_COL: long_df['value'].astype('int64').values,
+        })
+
+    return cached('industrial_counts', [file_path], build)
+
+
+# --- Merged gas + electricity table ---
+@timed()
+def load_merged_prices(start: str = DEFAULT_START, end: str = DEFAULT_END,
+                       gas_path: str = GAS_FILE, elec_path: str = ELEC_FILE) -> pd.DataFrame:
+    """Gas and electricity prices ($/MWh) for states present in both sources."""
+    def build():
+        return load_gas_prices(start, end, 'MWh', gas_path).merge(
+            load_elec_prices('MWh', elec_path), on='state', how='inner')
+
+    return cached(('merged_prices', start, end), [gas_path, elec_path], build)
@@ -0,0 +1,220 @@
+"""Shared figure components.
+
+Each helper adds a fixed number of traces no matter how many states (or
+sites) are drawn: per-point values go into arrays on a single trace instead
+of one go.Scattergeo per point, which keeps figure construction, JSON payload
+and client-side redraw small.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from facilities import DEFAULT_CELL_DEG, GridIndex
+from states import CUSTOM_LABEL_POSITIONS, STATE_CENTROIDS
+
+LABEL_FONT = dict(color='black', size=16, family='Arial Black')
+INDUSTRIAL_MARKER = dict(color='blue', opacity=0.2, line=dict(width=1, color='darkblue'))
+
+
+BASE_LAYOUT = dict(geo=dict(scope='usa'))
+CATEGORY_COLORS = ['green', 'red', 'gray']
+
+
+def hover_text(df):
+    return [f"{state}: Gas ${gas:.2f}/MWh, Elec ${elec:.2f}/MWh"
+            for state, gas, elec in zip(df['state'], df['nat_gas_price'], df['elec_price'])]
+
+
+def category_traces(merged_df, colors, categories=CATEGORY_COLORS):
+    """One solid-colour choropleth trace per category, with gas/electricity hover text."""
+    colors = np.asarray(colors)
+    hover = np.array(hover_text(merged_df), dtype=object)
+    states = merged_df['state'].to_numpy()
+    traces = []
+    for color in categories:
+        mask = colors == color
+        traces.append(go.Choropleth(
+            locations=states[mask],
+            z=np.ones(mask.sum()),  # dummy value
+            locationmode='USA-states',
+            colorscale=[[0, color], [1, color]],
+            showscale=False,
+            marker_line_color='white',
+            name=color.capitalize(),
+            hovertext=hover[mask],
+            hoverinfo='text',
+        ))
+    return traces
+
+
+def price_trace(df, value_col, title='Avg Price ($/MWh)'):
+    """Continuous Viridis choropleth, colour capped at the 95th percentile (e.g. Hawaii)."""
+    values = df[value_col]
+    return go.Choropleth(
+        locations=df['state'],
+        z=values,
+        locationmode='USA-states',
+        colorscale='Viridis',
+        zmin=values.min(),
+        zmax=values.quantile(0.95),
+        colorbar=dict(title=title),
+        marker_line_color='white',
+        hovertemplate='%{location}: $%{z:.2f}<extra></extra>',
+    )
+
+
+def state_label_traces(df, value_col, state_col='state'):
+    """State labels ("ST: $price") as one text trace, plus one leader-line trace.
+
+    Crowded Northeast states are labelled at CUSTOM_LABEL_POSITIONS with a
+    line back to the state centroid; every other state at its centroid.
+    """
+    df = df.dropna(subset=[value_col])
+    df = df[df[state_col].isin(STATE_CENTROIDS)]
+    states = df[state_col].to_numpy()
+    text = [f"{state}: ${price:.2f}" for state, price in zip(states, df[value_col].to_numpy())]
+    centroids = np.array([STATE_CENTROIDS[s] for s in states]).reshape(-1, 2)
+    positions = np.array([CUSTOM_LABEL_POSITIONS.get(s, STATE_CENTROIDS[s]) for s in states]).reshape(-1, 2)
+    traces = []
+
+    # Leader lines: centroid -> label segments separated by None
+    offset = np.array([s in CUSTOM_LABEL_POSITIONS for s in states], dtype=bool)
+    if offset.any():
+        segments = np.full((offset.sum(), 3, 2), None, dtype=object)
+        segments[:, 0] = centroids[offset]
+        segments[:, 1] = positions[offset]
+        lat_lon = segments.reshape(-1, 2)
+        traces.append(go.Scattergeo(
+            lat=lat_lon[:, 0],
+            lon=lat_lon[:, 1],
+            mode='lines',
+            line=dict(width=1, color='black'),
+            showlegend=False,
+            hoverinfo='skip',
+        ))
+
+    traces.append(go.Scattergeo(
+        lat=positions[:, 0],
+        lon=positions[:, 1],
+        text=text,
+        mode='text',
+        showlegend=False,
+        textfont=LABEL_FONT,
+        hovertext=text,
+        hoverinfo='text',
+    ))
+    return traces
+
+
+def add_state_labels(fig, df, value_col, state_col='state'):
+    fig.add_traces(state_label_traces(df, value_col, state_col))
+    return fig
+
+
+def industrial_marker_size(num_companies):
+    # Scale circle size based on number of companies (min 5, max 20)
+    return np.clip(5 + np.asarray(num_companies) * 2, 5, 20)
+
+
+def add_site_markers(fig, states, lat, lon, num_companies):
+    """Add industrial-site circles as one marker trace, plus two legend-only size entries."""
+    num_companies = np.asarray(num_companies).astype(int)
+    fig.add_trace(go.Scattergeo(
+        lat=lat,
+        lon=lon,
+        mode='markers',
+        marker=dict(size=industrial_marker_size(num_companies), **INDUSTRIAL_MARKER),
+        name='Industrial sites',
+        showlegend=False,
+        hovertext=[f'{s}: {n} industrial companies' for s, n in zip(states, num_companies)],
+        hoverinfo='text',
+    ))
+
+    # Add legend circles for scale (positioned off-map)
+    legend_sizes = [5, 20]
+    legend_companies = [1, 15]
+    for size, companies in zip(legend_sizes, legend_companies):
+        fig.add_trace(go.Scattergeo(
+            lon=[None],
+            lat=[None],
+            mode='markers',
+            marker=dict(size=size, **INDUSTRIAL_MARKER),
+            name=f'{companies} industrial sites',
+            showlegend=True,
+            hovertext=f'Legend: {companies} industrial sites',
+            hoverinfo='text'
+        ))
+    return fig
+
+
+def facility_density_trace(facilities, cell_deg=DEFAULT_CELL_DEG, index=None):
+    """Facilities aggregated into grid cells: one bubble per occupied cell, sized and coloured by weight."""
+    if index is None or index.cell_deg != cell_deg:
+        index = GridIndex.from_facilities(facilities, cell_deg)
+    cells = index.cell_counts(facilities['weight'].to_numpy())
+    weight = cells['weight'].to_numpy()
+    # Area, not radius, proportional to weight
+    size = 4 + 16 * np.sqrt(weight / weight.max()) if len(weight) else []
+    return go.Scattergeo(
+        lat=cells['lat'],
+        lon=cells['lon'],
+        mode='markers',
+        marker=dict(size=size, color=weight, colorscale='Blues', opacity=0.6,
+                    line=dict(width=0.5, color='darkblue'), showscale=False),
+        name='Industrial sites',
+        hovertext=[f'{w:g} sites ({n} facilities)' for w, n in zip(weight, cells['count'])],
+        hoverinfo='text',
+    )
+
+
+def add_facility_density(fig, facilities, cell_deg=DEFAULT_CELL_DEG, index=None):
+    fig.add_trace(facility_density_trace(facilities, cell_deg, index))
+    return fig
+
+
+def score_traces(candidates, scores, top, state_col='state'):
+    """Choropleth of cost scores (lower is better), the top candidates outlined and numbered by rank.
+
+    top holds candidate positions, best first (see scoring.ScoringEngine.top_k).
+    """
+    states = candidates[state_col].to_numpy()
+    scores = np.asarray(scores, dtype=float)
+    scored = ~np.isnan(scores)
+    hover = [f'{s}: score {v:.3f}' if ok else f'{s}: not ranked (missing data)'
+             for s, v, ok in zip(states, scores, scored)]
+    top_states = states[top]
+    return [
+        go.Choropleth(
+            locations=states[scored],
+            z=scores[scored],
+            locationmode='USA-states',
+            colorscale='RdYlGn_r',
+            zmin=0,
+            zmax=1,
+            colorbar=dict(title=dict(text='Cost score<br>(lower is better)')),
+            marker_line_color='white',
+            name='Score',
+            hovertext=np.array(hover, dtype=object)[scored],
+            hoverinfo='text',
+        ),
+        go.Choropleth(
+            locations=top_states,
+            z=np.ones(len(top_states)),
+            locationmode='USA-states',
+            colorscale=[[0, 'rgba(0,0,0,0)'], [1, 'rgba(0,0,0,0)']],
+            showscale=False,
+            marker_line_color='black',
+            marker_line_width=3,
+            name=f'Top {len(top_states)}',
+            showlegend=True,
+            hoverinfo='skip',
+        ),
+        go.Scattergeo(
+            lat=candidates['lat'].to_numpy()[top],
+            lon=candidates['lon'].to_numpy()[top],
+            text=[str(rank) for rank in range(1, len(top) + 1)],
+            mode='text',
+            textfont=LABEL_FONT,
+            showlegend=False,
+            hoverinfo='skip',
+        ),
+    ]
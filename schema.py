@@ -0,0 +1,144 @@
+"""Header validation and column resolution for the source workbooks.
+
+A Schema describes the columns a reader needs as precompiled patterns. Before
+any data is parsed, read_validated() reads only the header row, resolves every
+pattern to a column and raises one SchemaError listing every problem found
+(missing, ambiguous or unrecognized columns, unknown or missing states). Only
+then is the sheet read from the same open workbook, limited to the resolved
+columns (usecols) and cast to their declared dtypes.
+
+Wide sources (the gas workbook: one price column per state) also declare a
+region pattern whose 'name' group is looked up in a code table. Every column
+that is not a named field must resolve to a code, so a renamed or new EIA
+column stops the ingest instead of silently dropping a state.
+"""
+import difflib
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+
+class SchemaError(ValueError):
+    """A workbook header does not match its schema; the message is the full report."""
+
+    def __init__(self, schema, file_path, problems):
+        self.schema = schema
+        self.file_path = file_path
+        self.problems = list(problems)
+        where = f'{file_path} (sheet {schema.sheet!r}, header row {schema.header + 1})'
+        super().__init__('\n'.join([f'{schema.name}: {where} does not match the expected layout'] +
+                                   [f'  - {problem}' for problem in self.problems]))
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str              # key the reader looks the column up by
+    pattern: re.Pattern    # must match the whole header cell
+    dtype: str = None      # read_excel dtype; None leaves it to pandas
+
+
+def column(name, pattern, dtype=None):
+    """Field for one required column; pattern is a regular expression for the full header text."""
+    return Field(name, re.compile(pattern), dtype)
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    fields: tuple = ()
+    sheet: object = 0
+    header: int = 0
+    regions: Field = None           # wide sources: one column per region, captured as (?P<name>...)
+    codes: dict = None              # region name -> code
+    required: frozenset = frozenset()  # codes that must each have a column
+
+
+@dataclass
+class Columns:
+    """Resolved header: field name -> column, and (wide sources) column -> region code, in sheet order."""
+    fields: dict
+    regions: dict = field(default_factory=dict)
+
+    @property
+    def usecols(self):
+        return list(self.fields.values()) + list(self.regions)
+
+
+def _readable(pattern):
+    # Pattern text with anchors and escapes removed, to compare against header cells
+    return pattern.strip('^$').replace('\\', '')
+
+
+def _closest(text, candidates, kind='header'):
+    matches = difflib.get_close_matches(text, [str(c) for c in candidates], n=1, cutoff=0.6)
+    return f'; closest {kind}: {matches[0]!r}' if matches else ''
+
+
+def resolve(schema, columns, file_path=''):
+    """Columns for a header, or SchemaError with every problem found."""
+    columns = [str(c) for c in columns]
+    problems = []
+    fields = {}
+    for f in schema.fields:
+        matches = [c for c in columns if f.pattern.fullmatch(c)]
+        if not matches:
+            problems.append(f"no column for '{f.name}' (expected /{f.pattern.pattern}/"
+                            f'{_closest(_readable(f.pattern.pattern), columns)})')
+        elif len(matches) > 1:
+            problems.append(f"'{f.name}' matches several columns: {', '.join(map(repr, matches))}")
+        else:
+            fields[f.name] = matches[0]
+
+    regions = {}
+    if schema.regions is not None:
+        seen = {}
+        claimed = set(fields.values())
+        for c in columns:
+            if c in claimed:
+                continue
+            match = schema.regions.pattern.fullmatch(c)
+            if match is None:
+                problems.append(f'unrecognized column {c!r} (expected /{schema.regions.pattern.pattern}/)')
+                continue
+            code = schema.codes.get(match.group('name'))
+            if code is None:
+                problems.append(f"unknown region {match.group('name')!r} in column {c!r}"
+                                f"{_closest(match.group('name'), schema.codes, 'known name')}")
+            elif code in seen:
+                problems.append(f'two columns for {code}: {seen[code]!r} and {c!r}')
+            else:
+                seen[code] = c
+                regions[c] = code
+        missing = sorted(set(schema.required) - set(regions.values()))
+        if missing:
+            problems.append(f'no column for: {", ".join(missing)}')
+
+    if problems:
+        raise SchemaError(schema, file_path, problems)
+    return Columns(fields, regions)
+
+
+def read_header(schema, book):
+    """Header cells of the schema's sheet, without parsing any data rows; book is a path or pd.ExcelFile."""
+    return pd.read_excel(book, sheet_name=schema.sheet, header=schema.header, nrows=0).columns
+
+
+def dtypes(schema, columns):
+    """Declared dtype per resolved column."""
+    result = {columns.fields[f.name]: f.dtype for f in schema.fields if f.dtype}
+    if schema.regions is not None and schema.regions.dtype:
+        result.update(dict.fromkeys(columns.regions, schema.regions.dtype))
+    return result
+
+
+def read_validated(schema, file_path):
+    """(DataFrame of the resolved columns only, Columns); SchemaError before the data is read."""
+    # Opening the workbook is most of the cost, so the header and data reads share it
+    with pd.ExcelFile(file_path) as book:
+        columns = resolve(schema, read_header(schema, book), file_path)
+        df = book.parse(schema.sheet, header=schema.header, usecols=columns.usecols)
+    # Cast after parsing, and only the columns that differ: dtype= in the Excel
+    # parser converts cell by cell even when pandas already read floats
+    casts = {name: dtype for name, dtype in dtypes(schema, columns).items() if df[name].dtype != dtype}
+    return (df.astype(casts) if casts else df), columns
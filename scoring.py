@@ -0,0 +1,136 @@
+"""Rank candidate sites by a weighted energy-cost score.
+
+Criteria, one column each in a candidate table:
+
+    gas_price      average industrial gas price, $/MWh (lower is better)
+    elec_price     average industrial electricity price, $/MWh (lower is better)
+    site_density   existing industrial sites within DENSITY_RADIUS_KM (higher is better)
+    site_distance  km to the nearest existing industrial site (lower is better)
+
+ScoringEngine scales every criterion once into a cost in [0, 1] (0 for the
+best candidate, 1 for the worst) and keeps the (candidates x criteria) matrix.
+Scoring under new weights is then a single matrix-vector product, and top_k
+takes the k lowest scores with np.argpartition (linear time) and sorts only
+those k. That keeps re-ranking interactive at facility scale. A candidate
+missing a criterion that has non-zero weight is left unranked.
+
+state_candidates builds the table for states: centroids, prices from the
+feature table, and sites from facilities.load_facilities (the facility file, or
+per-state counts at the centroids). With that per-state stand-in, a state's
+own row sits exactly at the candidate's location, so it is left out of both
+site criteria: site_density counts other states' sites within the radius and
+site_distance is the distance to the nearest other state with sites. A table
+with the same columns and one row per facility can be ranked the same way.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import cached
+from facilities import FACILITY_FILE, GridIndex, haversine_km, load_facilities, nearest_km
+from features import SOURCE_FILES, _present, load_features
+from pipeline import DEFAULT_END, DEFAULT_START
+
+# Criterion -> direction: 'min' if lower values are better, 'max' if higher are
+CRITERIA = {'gas_price': 'min', 'elec_price': 'min', 'site_density': 'max', 'site_distance': 'min'}
+DEFAULT_WEIGHTS = {'gas_price': 0.4, 'elec_price': 0.4, 'site_density': 0.1, 'site_distance': 0.1}
+DENSITY_RADIUS_KM = 300.0
+DEFAULT_K = 10
+
+
+def state_candidates(start=DEFAULT_START, end=DEFAULT_END, radius_km=DENSITY_RADIUS_KM):
+    """One row per state with a centroid: state, lat, lon and the CRITERIA columns."""
+    def build():
+        features = load_features(start, end)
+        rows = np.flatnonzero(features.mask('lat', 'lon'))
+        lat, lon = features.column('lat')[rows], features.column('lon')[rows]
+        states = features.states[rows]
+        sites = load_facilities()
+        site_lat, site_lon = sites['lat'].to_numpy(), sites['lon'].to_numpy()
+        site_weight = sites['weight'].to_numpy(dtype=float)
+        index = GridIndex(site_lat, site_lon)
+        density = np.array([index.count_within(a, o, radius_km, site_weight) for a, o in zip(lat, lon)], dtype=float)
+        if os.path.exists(FACILITY_FILE):
+            distance = nearest_km(lat, lon, site_lat, site_lon)
+        else:
+            # Per-state stand-in: drop each state's own row (distance 0, always within the radius)
+            own = np.asarray(states, dtype=str)[:, None] == sites['state'].astype(str).to_numpy()[None, :]
+            density -= (own * site_weight).sum(axis=1)
+            distances = haversine_km(lat[:, None], lon[:, None], site_lat[None, :], site_lon[None, :])
+            distance = np.where(own, np.inf, distances).min(axis=1, initial=np.inf)
+        return pd.DataFrame({
+            'state': states,
+            'lat': lat,
+            'lon': lon,
+            'gas_price': features.column('nat_gas_price')[rows],
+            'elec_price': features.column('elec_price')[rows],
+            'site_density': density,
+            'site_distance': distance,
+        })
+
+    return cached(('state_candidates', start, end, radius_km), _present(SOURCE_FILES + (FACILITY_FILE,)), build)
+
+
+class ScoringEngine:
+    """Pre-scaled criterion costs for a candidate table; scores and top-k under any weights."""
+
+    def __init__(self, candidates, criteria=CRITERIA):
+        self.candidates = candidates.reset_index(drop=True)
+        self.criteria = tuple(criteria)
+        values = self.candidates[list(self.criteria)].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        lo = np.min(np.where(present, values, np.inf), axis=0)
+        hi = np.max(np.where(present, values, -np.inf), axis=0)
+        span = np.where(hi > lo, hi - lo, 1.0)
+        costs = (values - lo) / span
+        higher_is_better = np.array([criteria[c] == 'max' for c in self.criteria])
+        costs[:, higher_is_better] = 1 - costs[:, higher_is_better]
+        # Missing values are zero in the matrix and tracked separately, so
+        # the score stays one matrix-vector product
+        self._missing = ~present
+        self._costs = np.where(present, costs, 0.0)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def weight_vector(self, weights):
+        """Weights in criteria order, normalized to sum to 1 (unlisted criteria get 0)."""
+        unknown = set(weights) - set(self.criteria)
+        if unknown:
+            raise ValueError(f'Unknown criteria: {", ".join(sorted(unknown))}')
+        w = np.array([float(weights.get(c, 0.0)) for c in self.criteria])
+        if (w < 0).any() or not w.sum() > 0:
+            raise ValueError('Weights must be non-negative with a positive sum')
+        return w / w.sum()
+
+    def scores(self, weights):
+        """Score per candidate in [0, 1], lower is better; NaN where a weighted criterion is missing."""
+        w = self.weight_vector(weights)
+        scores = self._costs @ w
+        scores[self._missing[:, w > 0].any(axis=1)] = np.nan
+        return scores
+
+    def top_k(self, weights, k=DEFAULT_K, scores=None):
+        """Positions of the k best-scoring candidates, best first."""
+        if scores is None:
+            scores = self.scores(weights)
+        ranked = np.flatnonzero(~np.isnan(scores))
+        k = min(int(k), len(ranked))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k < len(ranked):
+            ranked = ranked[np.argpartition(scores[ranked], k - 1)[:k]]
+        return ranked[np.argsort(scores[ranked], kind='stable')]
+
+    def rank(self, weights, k=DEFAULT_K):
+        """The top k candidates, best first, with rank, score and each criterion's weighted cost."""
+        w = self.weight_vector(weights)
+        scores = self.scores(weights)
+        top = self.top_k(weights, k, scores)
+        result = self.candidates.iloc[top].reset_index(drop=True)
+        result.insert(0, 'rank', np.arange(1, len(top) + 1))
+        result['score'] = scores[top]
+        for i, name in enumerate(self.criteria):
+            result[f'{name}_cost'] = self._costs[top, i] * w[i]
+        return result
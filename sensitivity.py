@@ -0,0 +1,214 @@
+"""How robust is each state's category to the constants behind it?
+
+Two categorizations are tested:
+
+    threshold  green / red / gray from classify's rules (gas and electricity
+               thresholds, gas converted at mwh_per_kcf)
+    cluster    Low / Median / High from the price summary (Low is at or below
+               the cross-state median, High above high_cut, Median between).
+               Where high_cut is below the median, summarize_prices lists a
+               state in both Low and High; here each state needs a single
+               category, so Low takes precedence
+
+A scenario is one combination of the swept parameters (mwh_per_kcf,
+gas_threshold, elec_threshold, high_cut), optionally crossed with Monte Carlo
+draws of the gas prices. Each draw replaces a state's window average with a
+normal sample using that state's mean and standard deviation of monthly prices
+over the window, i.e. a plausible single month. The electricity workbook has
+no monthly history, so electricity prices are held at their averages.
+
+All scenarios are evaluated as (scenarios x states) arrays, in chunks, and
+reduced to per-state shares. A state's stability is the share of scenarios
+that give it the same category as the baseline parameters do.
+"""
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from classify import DEFAULT_LABELS
+from pipeline import DEFAULT_END, DEFAULT_START, GAS_UNIT_FACTORS, load_elec_prices, load_gas_monthly
+from summary import CLUSTERS, HIGH_CUT
+
+BASELINE = {
+    'mwh_per_kcf': GAS_UNIT_FACTORS['MWh'],
+    'gas_threshold': 30.0,
+    'elec_threshold': 105.0,
+    'high_cut': HIGH_CUT,
+}
+PARAMETERS = tuple(BASELINE)
+DEFAULT_GRID = {
+    'mwh_per_kcf': (3.0, 3.15, 3.29, 3.45, 3.6),
+    'gas_threshold': (20.0, 25.0, 30.0, 35.0, 40.0),
+    'elec_threshold': (90.0, 97.5, 105.0, 112.5, 120.0),
+    'high_cut': (40.0, 45.0, 50.0, 55.0, 60.0),
+}
+KINDS = {'threshold': DEFAULT_LABELS, 'cluster': CLUSTERS}
+
+
+def state_inputs(start=DEFAULT_START, end=DEFAULT_END):
+    """Per-state gas mean and monthly standard deviation ($/kcf) and electricity price ($/MWh)."""
+    monthly = load_gas_monthly('kcf').loc[pd.Timestamp(start):pd.Timestamp(end)]
+    means = monthly.mean()
+    stds = monthly.std()
+    elec = load_elec_prices('MWh').set_index('state')['elec_price'].reindex(monthly.columns)
+    return pd.DataFrame({'gas_kcf': means, 'gas_kcf_std': stds, 'elec_price': elec})
+
+
+def scenario_grid(grid=DEFAULT_GRID):
+    """One row per combination of the swept values (itertools.product order); unswept parameters at baseline."""
+    swept = {p: tuple(grid.get(p, (BASELINE[p],))) for p in PARAMETERS}
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f'Unknown parameter(s): {", ".join(sorted(unknown))}')
+    combos = np.array(list(itertools.product(*swept.values())), dtype=float).reshape(-1, len(PARAMETERS))
+    return pd.DataFrame(combos, columns=list(PARAMETERS))
+
+
+def categorize(gas_kcf, elec, params):
+    """Category codes (index into KINDS[kind]) for gas/elec arrays of shape (scenarios, states).
+
+    params maps each parameter to a (scenarios,) array.
+    """
+    gas = gas_kcf * params['mwh_per_kcf'][:, None]
+    gas_threshold = params['gas_threshold'][:, None]
+    elec_threshold = params['elec_threshold'][:, None]
+    any_above = (gas > gas_threshold) | (elec > elec_threshold)
+    all_below = (gas <= gas_threshold) & (elec <= elec_threshold)
+    threshold = np.select([any_above, all_below], [0, 1], default=2).astype(np.int8)
+
+    with np.errstate(invalid='ignore'):
+        median = np.nanmedian(gas, axis=1)[:, None]
+    present = ~np.isnan(gas)
+    cluster = np.select([present & (gas <= median), present & (gas > params['high_cut'][:, None]), present],
+                        [0, 2, 1], default=-1).astype(np.int8)
+    return {'threshold': threshold, 'cluster': cluster}
+
+
+@dataclass
+class SensitivityResult:
+    states: list
+    scenarios: int
+    draws: int
+    grid: dict
+    baseline: dict        # kind -> category label per state
+    shares: dict          # kind -> DataFrame (states x labels), share of scenarios
+    by_value: dict        # kind -> {parameter: DataFrame (states x values), share agreeing with baseline}
+
+    def stability(self, kind='threshold'):
+        """Share of scenarios giving each state its baseline category."""
+        shares = self.shares[kind]
+        return pd.Series([shares.at[s, label] if label in shares else np.nan
+                          for s, label in zip(self.states, self.baseline[kind])], index=self.states,
+                         name=f'{kind}_stability')
+
+    def table(self):
+        """Per-state baseline category, stability and category shares for both kinds."""
+        parts = []
+        for kind in KINDS:
+            parts.append(pd.Series(self.baseline[kind], index=self.states, name=f'{kind}_baseline'))
+            parts.append(self.stability(kind))
+            parts.append(self.shares[kind].add_prefix(f'{kind}_share_'))
+        return pd.concat(parts, axis=1)
+
+    def to_dict(self):
+        table = self.table().astype(object)
+        return {
+            'scenarios': self.scenarios,
+            'draws': self.draws,
+            'grid': {p: list(v) for p, v in self.grid.items()},
+            # NaN (no baseline category) -> null
+            'states': table.where(table.notna(), None).reset_index(names='state').to_dict('records'),
+        }
+
+    @property
+    def heatmap_height(self):
+        return max(400, 18 * len(self.states) + 150)
+
+    def stability_heatmap(self, kind='threshold'):
+        """States (least stable first) against each swept parameter value, coloured by agreement with baseline."""
+        import plotly.graph_objects as go
+
+        stability = self.stability(kind).sort_values()
+        columns = [('all scenarios', stability)]
+        for parameter, table in self.by_value[kind].items():
+            if table.shape[1] > 1:
+                columns += [(f'{parameter}={value:g}', table[value]) for value in table.columns]
+        z = np.column_stack([values.reindex(stability.index).to_numpy() for _, values in columns])
+        baseline = pd.Series(self.baseline[kind], index=self.states).reindex(stability.index)
+        fig = go.Figure(go.Heatmap(
+            z=z,
+            x=[name for name, _ in columns],
+            y=[f'{s} ({b})' for s, b in zip(stability.index, baseline)],
+            zmin=0,
+            zmax=1,
+            colorscale='RdYlGn',
+            colorbar=dict(title='Share in<br>baseline<br>category'),
+            hovertemplate='%{y}, %{x}: %{z:.0%}<extra></extra>',
+        ))
+        fig.update_layout(
+            title=dict(text=f'Category stability by state ({kind}, {self.scenarios:,} scenarios)', x=0.5,
+                       xanchor='center'),
+            height=self.heatmap_height,
+            yaxis=dict(autorange='reversed', dtick=1),
+        )
+        return fig
+
+
+def run_sensitivity(grid=DEFAULT_GRID, draws=0, seed=0, start=DEFAULT_START, end=DEFAULT_END, chunk_size=8192):
+    """Evaluate every grid combination (x draws Monte Carlo samples when draws > 0)."""
+    inputs = state_inputs(start, end)
+    states = inputs.index.tolist()
+    combos = scenario_grid(grid)
+    n_draws = max(int(draws), 1)
+    n_scenarios = len(combos) * n_draws
+    elec = inputs['elec_price'].to_numpy()[None, :]
+    means = inputs['gas_kcf'].to_numpy()
+    stds = np.nan_to_num(inputs['gas_kcf_std'].to_numpy())
+    rng = np.random.default_rng(seed)
+    samples = (np.clip(rng.normal(means, stds, size=(n_draws, len(states))), 0, None) if draws
+               else means[None, :])
+
+    baseline_params = {p: np.array([BASELINE[p]]) for p in PARAMETERS}
+    baseline_codes = {kind: codes[0] for kind, codes in categorize(means[None, :], elec, baseline_params).items()}
+
+    combo_values = {p: combos[p].to_numpy() for p in PARAMETERS}
+    # Position of each combination's value within that parameter's distinct values
+    value_index = {p: np.unique(v, return_inverse=True) for p, v in combo_values.items()}
+    counts = {kind: np.zeros((len(labels), len(states))) for kind, labels in KINDS.items()}
+    agree = {kind: {p: np.zeros((len(value_index[p][0]), len(states))) for p in PARAMETERS} for kind in KINDS}
+
+    for lo in range(0, n_scenarios, chunk_size):
+        scenario = np.arange(lo, min(lo + chunk_size, n_scenarios))
+        combo, draw = np.divmod(scenario, n_draws)
+        params = {p: v[combo] for p, v in combo_values.items()}
+        codes = categorize(samples[draw], elec, params)
+        for kind, labels in KINDS.items():
+            for code in range(len(labels)):
+                counts[kind][code] += (codes[kind] == code).sum(axis=0)
+            matches = (codes[kind] == baseline_codes[kind][None, :]).astype(float)
+            for p in PARAMETERS:
+                # (values x scenarios) one-hot times (scenarios x states) matches
+                values, inverse = value_index[p]
+                one_hot = (inverse[combo][None, :] == np.arange(len(values))[:, None]).astype(float)
+                agree[kind][p] += one_hot @ matches
+
+    per_value = {p: np.bincount(value_index[p][1], minlength=len(value_index[p][0])) * n_draws
+                 for p in PARAMETERS}
+    shares, by_value, baseline = {}, {}, {}
+    for kind, labels in KINDS.items():
+        shares[kind] = pd.DataFrame((counts[kind] / n_scenarios).T, index=states, columns=list(labels))
+        by_value[kind] = {p: pd.DataFrame((agree[kind][p] / per_value[p][:, None]).T, index=states,
+                                          columns=value_index[p][0].tolist())
+                          for p in PARAMETERS}
+        baseline[kind] = [labels[c] if c >= 0 else None for c in baseline_codes[kind]]
+    return SensitivityResult(
+        states=states,
+        scenarios=n_scenarios,
+        draws=int(draws),
+        grid={p: tuple(value_index[p][0].tolist()) for p in PARAMETERS},
+        baseline=baseline,
+        shares=shares,
+        by_value=by_value,
+    )
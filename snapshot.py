@@ -0,0 +1,345 @@
+"""Columnar snapshots of the source workbooks.
+
+Each workbook is normalized once into a tidy long table (date, state, series,
+value) and written as an uncompressed Feather file under snapshots/, which
+is memory-mapped on load. A snapshot records the mtime/size of the workbook it
+came from; when the workbook changes the snapshot is considered stale and is
+rebuilt from Excel on the next load.
+
+Dated sources (the monthly gas series) are ingested incrementally: only rows
+newer than the snapshot are appended, and running per-state sums/counts are
+kept alongside so window averages never rescan history.
+
+Usage:
+    python snapshot.py            # ingest all stale sources
+    python snapshot.py --force    # re-ingest everything
+    python snapshot.py gas elec   # ingest selected sources
+    python snapshot.py --check    # only validate the workbook headers
+
+Every workbook's header row is checked against its schema (schema.py) before
+the data is parsed, and only the columns the readers use are read.
+
+After the sources, the per-state feature table (features.py) and the monthly
+animation (animation.py) for the default window are rebuilt if any of them
+changed.
+"""
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import configure_logging, stage
+from schema import Schema, SchemaError, column, read_header, read_validated, resolve
+from states import STATE_ABBREV
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are an optimization; Excel still works without pyarrow
+    pa = None
+
+SNAPSHOT_DIR = 'snapshots'
+
+GAS_FILE = 'Domestic Natural Gas Data.xls'
+GAS_SHEET = 'Data 1'
+ELEC_FILE = 'electricity_price_avg.xlsx'
+INDUSTRIAL_FILE = 'industrial_sites_rtc_member_data.xlsx'
+
+INDUSTRIAL_COUNT_COL = 'Number of Companies with Industrial/Manufacturing Sites'
+
+# Series names used in the long format, with the units they are stored in
+GAS_SERIES = 'gas_industrial_price'          # $/kcf
+ELEC_SERIES = 'elec_price'                   # cents/kWh
+INDUSTRIAL_SERIES = 'industrial_companies'   # count
+
+LONG_COLUMNS = ['date', 'state', 'series', 'value']
+
+
+# --- Excel readers (workbook -> long format) ---
+# Matches a gas price column and captures the state name. "Indu?s?trial" also
+# accepts the misspelled Nevada column ("Nevada Natural Gas Indutrial Price ...").
+GAS_COLUMN_PATTERN = r'^(?P<name>.+) Natural Gas Indu?s?trial Price \(Dollars per Thousand Cubic Feet\)$'
+GAS_CODES = {**STATE_ABBREV, 'United States': 'US'}
+
+# Header layouts, checked before each workbook is parsed (see schema.py)
+GAS_SCHEMA = Schema(
+    'gas',
+    fields=(column('date', r'Date'),),
+    sheet=GAS_SHEET,
+    header=2,
+    regions=column('price', GAS_COLUMN_PATTERN, 'float64'),
+    codes=GAS_CODES,
+    required=frozenset(GAS_CODES.values()),
+)
+ELEC_SCHEMA = Schema(
+    'elec',
+    fields=(column('state', r'State'), column('price', r'Average Price \(cents/kWh\)', 'float64')),
+    header=2,
+)
+INDUSTRIAL_SCHEMA = Schema(
+    'industrial',
+    fields=(column('state', r'State'), column('count', re.escape(INDUSTRIAL_COUNT_COL), 'float64')),
+)
+
+
+def read_gas_excel(file_path=GAS_FILE):
+    df, columns = read_validated(GAS_SCHEMA, file_path)
+    date = columns.fields['date']
+    if not pd.api.types.is_datetime64_any_dtype(df[date]):
+        df[date] = pd.to_datetime(df[date])
+    wide = df[[date] + list(columns.regions)]
+    wide.columns = ['date'] + list(columns.regions.values())
+    long_df = wide.melt(id_vars='date', var_name='state', value_name='value')
+    long_df['series'] = GAS_SERIES
+    return long_df
+
+
+def read_elec_excel(file_path=ELEC_FILE):
+    elec_df, columns = read_validated(ELEC_SCHEMA, file_path)
+    # Census-division and U.S. total rows have no abbreviation and are dropped
+    long_df = pd.DataFrame({
+        'date': pd.NaT,
+        'state': elec_df[columns.fields['state']].map(STATE_ABBREV),
+        'value': elec_df[columns.fields['price']],
+    }).dropna(subset=['state'])
+    long_df['series'] = ELEC_SERIES
+    return long_df
+
+
+def read_industrial_excel(file_path=INDUSTRIAL_FILE):
+    industrial_df, columns = read_validated(INDUSTRIAL_SCHEMA, file_path)
+    long_df = pd.DataFrame({
+        'date': pd.NaT,
+        'state': industrial_df[columns.fields['state']],
+        'value': industrial_df[columns.fields['count']],
+    })
+    long_df['series'] = INDUSTRIAL_SERIES
+    return long_df
+
+
+SOURCES = {
+    'gas': (GAS_FILE, read_gas_excel),
+    'elec': (ELEC_FILE, read_elec_excel),
+    'industrial': (INDUSTRIAL_FILE, read_industrial_excel),
+}
+SCHEMAS = {'gas': GAS_SCHEMA, 'elec': ELEC_SCHEMA, 'industrial': INDUSTRIAL_SCHEMA}
+
+
+def _normalize(long_df):
+    long_df = long_df[LONG_COLUMNS].reset_index(drop=True)
+    long_df['date'] = pd.to_datetime(long_df['date']).astype('datetime64[ns]')
+    long_df['state'] = long_df['state'].astype('category')
+    long_df['series'] = long_df['series'].astype('category')
+    long_df['value'] = long_df['value'].astype('float64')
+    return long_df
+
+
+# --- Snapshot files ---
+def snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f'{name}.feather')
+
+
+def _source_stamp(source_path):
+    st = os.stat(source_path)
+    return {
+        b'source': os.path.abspath(source_path).encode(),
+        b'mtime_ns': str(st.st_mtime_ns).encode(),
+        b'size': str(st.st_size).encode(),
+    }
+
+
+def is_stale(name, source_path=None):
+    if pa is None:
+        return True
+    source_path = source_path or SOURCES[name][0]
+    path = snapshot_path(name)
+    if not os.path.exists(path):
+        return True
+    with pa.memory_map(path) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    stamp = _source_stamp(source_path)
+    return any(metadata.get(k) != v for k, v in stamp.items())
+
+
+def _write_table(path, table, source_path):
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **_source_stamp(source_path)})
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp_path = path + '.tmp'
+    # Uncompressed so the file can be memory-mapped without a decode step
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def _read_table(path):
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def write_snapshot(name, long_df, source_path):
+    table = pa.Table.from_pandas(_normalize(long_df), preserve_index=False)
+    _write_table(snapshot_path(name), table, source_path)
+
+
+# --- Cumulative tables ---
+# For dated sources a second file holds running per-state sums and counts of
+# the non-missing values, one row per date. The mean over any date window is
+# then (sum[end] - sum[start - 1]) / (count[end] - count[start - 1]), and a
+# monthly update only appends rows on top of the last running total.
+CUMULATIVE_SOURCES = {'gas'}
+
+
+def cumulative_path(name):
+    return os.path.join(SNAPSHOT_DIR, f'{name}_cumulative.feather')
+
+
+def build_cumulative(long_df, base=None):
+    """Running sums/counts per date with ('sum' | 'count', state) columns.
+
+    base is the previous cumulative table; the new rows are added on top of its
+    last row.
+    """
+    wide = long_df.pivot(index='date', columns='state', values='value').sort_index()
+    wide = wide[long_df['state'].unique()]
+    wide.columns = pd.Index(wide.columns.astype(str), name=None)
+    sums = wide.fillna(0).cumsum()
+    counts = wide.notna().cumsum()
+    if base is not None and len(base):
+        sums += base['sum'].iloc[-1].reindex(wide.columns, fill_value=0)
+        counts += base['count'].iloc[-1].reindex(wide.columns, fill_value=0)
+    cumulative = pd.concat({'sum': sums, 'count': counts.astype('int64')}, axis=1)
+    if base is not None:
+        cumulative = pd.concat([base, cumulative])
+    return cumulative
+
+
+def write_cumulative(name, cumulative, source_path):
+    flat = cumulative.copy()
+    flat.columns = [f'{kind}:{state}' for kind, state in flat.columns]
+    table = pa.Table.from_pandas(flat.reset_index(), preserve_index=False)
+    _write_table(cumulative_path(name), table, source_path)
+
+
+def read_cumulative(name):
+    flat = _read_table(cumulative_path(name)).set_index('date')
+    flat.columns = pd.MultiIndex.from_tuples([tuple(c.split(':', 1)) for c in flat.columns])
+    return flat
+
+
+# --- Ingest ---
+def _same_rows(a, b):
+    """True if two long frames hold the same (date, state, value) rows, in any order; NaN equals NaN."""
+    if len(a) != len(b):
+        return False
+    a, b = (pd.DataFrame({'date': df['date'].to_numpy(), 'state': df['state'].astype(str).to_numpy(),
+                          'value': df['value'].to_numpy(dtype=float)}).sort_values(['date', 'state'], kind='stable')
+            for df in (a, b))
+    return (np.array_equal(a['date'].to_numpy(), b['date'].to_numpy())
+            and np.array_equal(a['state'].to_numpy(), b['state'].to_numpy())
+            and np.array_equal(a['value'].to_numpy(), b['value'].to_numpy(), equal_nan=True))
+
+
+def _append_new_rows(name, long_df, source_path):
+    """Append rows dated after the current snapshot; None if a full rebuild is needed."""
+    path = snapshot_path(name)
+    if name not in CUMULATIVE_SOURCES or not os.path.exists(path) or not os.path.exists(cumulative_path(name)):
+        return None
+    with pa.memory_map(path) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    if metadata.get(b'source') != os.path.abspath(source_path).encode():
+        return None
+    old_df = _read_table(path)
+    last_date = old_df['date'].max()
+    new_df = long_df[long_df['date'] > last_date]
+    # Anything other than pure appends (revised or deleted history, new columns) rebuilds
+    if set(new_df['state']) - set(old_df['state']) or not _same_rows(old_df, long_df[long_df['date'] <= last_date]):
+        return None
+    cumulative = read_cumulative(name)
+    if len(new_df):
+        cumulative = build_cumulative(new_df, base=cumulative)
+        long_df = pd.concat([old_df, new_df], ignore_index=True)
+    else:
+        long_df = old_df
+    write_snapshot(name, long_df, source_path)
+    write_cumulative(name, cumulative, source_path)
+    return new_df['date'].nunique()
+
+
+def ingest(name, source_path=None, force=False):
+    """Bring a snapshot up to date; returns a short status string."""
+    source_path = source_path or SOURCES[name][0]
+    if not force and not is_stale(name, source_path):
+        return 'up to date'
+    with stage('excel_parse', source=name):
+        long_df = _normalize(SOURCES[name][1](source_path))
+    if not force:
+        appended = _append_new_rows(name, long_df, source_path)
+        if appended is not None:
+            return f'appended {appended} date(s)'
+    write_snapshot(name, long_df, source_path)
+    if name in CUMULATIVE_SOURCES:
+        write_cumulative(name, build_cumulative(long_df), source_path)
+    return 'ingested'
+
+
+def load_snapshot(name, source_path=None):
+    """Long-format frame for a source, from its snapshot when it is fresh."""
+    source_path = source_path or SOURCES[name][0]
+    if pa is None:
+        return _normalize(SOURCES[name][1](source_path))
+    if is_stale(name, source_path):
+        try:
+            ingest(name, source_path)
+        except OSError:
+            # read-only checkout: keep serving from Excel
+            return _normalize(SOURCES[name][1](source_path))
+    with stage('snapshot_load', source=name):
+        return _read_table(snapshot_path(name))
+
+
+def load_cumulative(name, source_path=None):
+    """Cumulative sum/count table for a dated source (see build_cumulative)."""
+    source_path = source_path or SOURCES[name][0]
+    if pa is None:
+        return build_cumulative(_normalize(SOURCES[name][1](source_path)))
+    if is_stale(name, source_path) or not os.path.exists(cumulative_path(name)):
+        try:
+            ingest(name, source_path, force=not os.path.exists(cumulative_path(name)))
+        except OSError:
+            return build_cumulative(load_snapshot(name, source_path))
+    return read_cumulative(name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert the source workbooks into columnar snapshots.')
+    parser.add_argument('sources', nargs='*', help=f'sources to ingest: {", ".join(SOURCES)} (default: all)')
+    parser.add_argument('--force', action='store_true', help='re-ingest even if the snapshot is fresh')
+    parser.add_argument('--check', action='store_true', help='only check the workbook headers against their schemas')
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error(f'unknown source(s): {", ".join(sorted(unknown))}')
+    configure_logging()
+    failed = False
+    for name in args.sources or SOURCES:
+        try:
+            if args.check:
+                resolve(SCHEMAS[name], read_header(SCHEMAS[name], SOURCES[name][0]), SOURCES[name][0])
+                status = 'header ok'
+            else:
+                status = ingest(name, force=args.force)
+        except SchemaError as e:
+            print(e, file=sys.stderr)
+            failed = True
+            continue
+        print(f'{name:<11} {status} -> {SOURCES[name][0] if args.check else snapshot_path(name)}')
+    if failed:
+        sys.exit(1)
+    if pa is not None and not args.check:
+        # The joined per-state feature table is built from the snapshots above
+        from features import features_path, ingest_features
+        print(f'{"features":<11} {ingest_features(force=args.force)} -> {features_path()}')
+        from animation import animation_json, animation_path
+        animation_json()
+        print(f'{"animation":<11} ready -> {animation_path()}')
@@ -0,0 +1,143 @@
+"""Load every data source concurrently into one bundle.
+
+Loading runs in two phases:
+
+1. Workbooks whose snapshot is stale are parsed in a process pool (Excel
+   parsing is CPU-bound, so threads would serialize on the GIL). Each worker
+   runs snapshot.ingest, which writes the snapshot files.
+2. The loaders themselves run in a thread pool in this process. They read the
+   fresh snapshots (or stream a workbook, for the global benchmarks), and their
+   results land in the usual data_loader cache.
+
+Each source has its own deadline, which covers both phases. A source that
+fails or times out is recorded in the bundle's errors and the others are still
+returned, so callers can degrade per source (e.g. draw the map without
+industrial sites).
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+
+from instrumentation import stage
+from pipeline import load_elec_prices, load_gas_cumulative, load_industrial_counts
+from snapshot import SOURCES, ingest, is_stale, pa
+
+DEFAULT_TIMEOUT = 120.0  # seconds per source
+# Workers are spawned rather than forked: the app calls load_sources from
+# Streamlit's threaded server, and a forked child inherits any lock (logging,
+# data_loader's cache lock) that another thread held at that moment, with
+# nothing left to release it.
+START_METHOD = 'spawn'
+
+
+def _load_global():
+    # Imported here: the module pulls in plotly and openpyxl
+    from global_gas_price_visualization import load_global_benchmarks
+    return load_global_benchmarks()
+
+
+# Source name -> loader run in the thread pool. Names that are also snapshot
+# sources get their workbook parsed in the process pool first when stale.
+LOADERS = {
+    'gas': load_gas_cumulative,
+    'elec': load_elec_prices,
+    'industrial': load_industrial_counts,
+    'global': _load_global,
+}
+APP_SOURCES = ('gas', 'elec', 'industrial')
+
+
+@dataclass
+class SourceBundle:
+    """Loaded values, errors and seconds spent (parse + load, or until failure), keyed by source name."""
+    values: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    seconds: dict = field(default_factory=dict)
+
+    def __getitem__(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        return self.values[name]
+
+    def __contains__(self, name):
+        return name in self.values
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def _ingest(name):
+    t0 = time.perf_counter()
+    ingest(name)
+    return time.perf_counter() - t0
+
+
+def _load(name):
+    t0 = time.perf_counter()
+    with stage('source_load', source=name):
+        value = LOADERS[name]()
+    return value, time.perf_counter() - t0
+
+
+def _collect(futures, deadlines, bundle, timeouts, on_result):
+    """Wait for each future until its source's deadline; failures go to bundle.errors."""
+    for name, future in futures.items():
+        try:
+            on_result(name, future.result(timeout=max(0.0, deadlines[name] - time.monotonic())))
+        except FutureTimeout:
+            future.cancel()
+            bundle.errors[name] = TimeoutError(f'{name} did not load within {timeouts[name]:g} s')
+        except Exception as e:
+            bundle.errors[name] = e
+
+
+def load_sources(names=tuple(LOADERS), timeout=DEFAULT_TIMEOUT, timeouts=None, workers=None, processes=True):
+    """SourceBundle for `names`; timeouts maps a source name to its own limit in seconds."""
+    unknown = set(names) - set(LOADERS)
+    if unknown:
+        raise ValueError(f'Unknown source(s): {", ".join(sorted(unknown))}')
+    limits = {name: (timeouts or {}).get(name, timeout) for name in names}
+    start = time.monotonic()
+    deadlines = {name: start + limits[name] for name in names}
+    bundle = SourceBundle()
+
+    # Phase 1: parse stale workbooks into snapshots, one process per workbook.
+    # A single stale workbook is left to its loader; a pool would only add start-up cost.
+    stale = []
+    for name in names:
+        try:
+            if name in SOURCES and pa is not None and is_stale(name):
+                stale.append(name)
+        except OSError as e:  # e.g. the workbook is missing
+            bundle.errors[name] = e
+    if processes and len(stale) > 1:
+        pool = ProcessPoolExecutor(max_workers=min(len(stale), workers or os.cpu_count() or 1),
+                                   mp_context=multiprocessing.get_context(START_METHOD))
+        try:
+            futures = {name: pool.submit(_ingest, name) for name in stale}
+            _collect(futures, deadlines, bundle, limits, bundle.seconds.__setitem__)
+        finally:
+            # Don't wait on a worker stuck past its deadline
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # Phase 2: run the loaders against the snapshots
+    pending = [name for name in names if name not in bundle.errors]
+    if pending:
+        pool = ThreadPoolExecutor(max_workers=min(len(pending), workers or len(pending)))
+        try:
+            futures = {name: pool.submit(_load, name) for name in pending}
+
+            def on_result(name, result):
+                bundle.values[name], seconds = result
+                bundle.seconds[name] = bundle.seconds.get(name, 0.0) + seconds
+
+            _collect(futures, deadlines, bundle, limits, on_result)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    for name in bundle.errors:
+        bundle.seconds[name] = time.monotonic() - start
+    return bundle
@@ -0,0 +1,46 @@
+# State name to abbreviation mapping
+STATE_ABBREV = {
+    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
+    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'District of Columbia': 'DC',
+    'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL',
+    'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA',
+    'Maine': 'ME', 'Maryland': 'MD', 'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN',
+    'Mississippi': 'MS', 'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
+    'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM', 'New York': 'NY',
+    'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR',
+    'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD',
+    'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA',
+    'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'
+}
+
+# State centroid coordinates (approximate)
+STATE_CENTROIDS = {
+    'AL': (32.8, -86.8), 'AK': (64.0, -152.0), 'AZ': (33.7, -111.6), 'AR': (35.2, -92.4),
+    'CA': (36.8, -119.4), 'CO': (39.0, -105.5), 'CT': (41.6, -72.7), 'DE': (38.9, -75.5),
+    'DC': (38.9, -77.0), 'FL': (27.7, -81.5), 'GA': (32.6, -83.4), 'HI': (19.9, -155.6),
+    'ID': (44.4, -114.7), 'IL': (40.0, -89.0), 'IN': (39.8, -86.1), 'IA': (42.0, -93.2),
+    'KS': (38.5, -98.0), 'KY': (37.5, -85.3), 'LA': (31.2, -91.8), 'ME': (44.5, -69.2),
+    'MD': (39.0, -76.7), 'MA': (42.3, -71.8), 'MI': (44.3, -85.6), 'MN': (46.7, -94.7),
+    'MS': (32.7, -89.6), 'MO': (38.5, -92.5), 'MT': (47.0, -110.5), 'NE': (41.5, -99.7),
+    'NV': (39.3, -116.6), 'NH': (43.7, -71.6), 'NJ': (40.1, -74.7), 'NM': (34.5, -106.0),
+    'NY': (43.0, -75.0), 'NC': (35.6, -79.8), 'ND': (47.5, -100.5), 'OH': (40.4, -82.7),
+    'OK': (35.6, -97.1), 'OR': (44.0, -120.6), 'PA': (40.9, -77.8), 'RI': (41.6, -71.5),
+    'SC': (33.9, -80.9), 'SD': (44.3, -100.3), 'TN': (35.7, -86.7), 'TX': (31.5, -100.0),
+    'UT': (39.3, -111.6), 'VT': (44.0, -72.7), 'VA': (37.5, -78.5), 'WA': (47.4, -121.5),
+    'WV': (38.6, -80.9), 'WI': (44.3, -89.6), 'WY': (42.7, -107.2)
+}
+
+# Custom label positions for crowded Northeast states (lat, lon) - staggered and spread out
+CUSTOM_LABEL_POSITIONS = {
+    'ME': (49.0, -62.0),
+    'NH': (48.0, -63.5),
+    'VT': (47.0, -65.0),
+    'MA': (46.0, -66.5),
+    'RI': (45.0, -68.0),
+    'CT': (44.0, -69.5),
+    'NY': (43.0, -71.0),
+    'NJ': (42.0, -72.5),
+    'DE': (41.0, -74.0),
+    'MD': (40.0, -75.5),
+    'DC': (39.0, -77.0)
+}
@@ -0,0 +1,159 @@
+"""Percentile and low/median/high cluster summary of state prices.
+
+summarize_prices sorts the non-missing prices once; every percentile (linear
+interpolation, same as pandas' quantile) and the cluster boundaries are read
+off that sorted array, and clusters are cut by rank rather than by filtering
+the frame once per cluster. The result is a PriceSummary whose to_dict()/to_json()
+form can be cached, stored and diffed between runs; format() gives the text
+report the CLI scripts print.
+"""
+import copy
+import json
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from data_loader import cached
+from pipeline import DEFAULT_END, DEFAULT_START, load_gas_prices
+from snapshot import GAS_FILE
+
+DEFAULT_PERCENTILES = tuple(range(0, 101, 5))
+QUARTILES = (25, 50, 75)
+HIGH_CUT = 50.0  # $/MWh; states above this are 'High'
+CLUSTERS = ('Low', 'Median', 'High')
+FLOAT_FIELDS = ('low', 'median', 'high', 'low_cut', 'high_cut')
+
+
+def _or_none(value):
+    return None if value != value else value  # NaN is the only value not equal to itself
+
+
+def _or_nan(value):
+    return float('nan') if value is None else value
+
+
+@dataclass
+class PriceSummary:
+    window: str
+    units: str
+    count: int
+    low: float
+    median: float
+    high: float
+    percentiles: dict   # percentile (int) -> price
+    low_cut: float      # the median; Low is <= low_cut
+    high_cut: float     # High is > high_cut
+    clusters: dict      # 'Low'/'Median'/'High' -> states, in input order
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    @property
+    def cluster_counts(self):
+        return {name: len(states) for name, states in self.clusters.items()}
+
+    def to_dict(self):
+        result = asdict(self)
+        # JSON object keys are strings, and JSON has no NaN (no prices present): use null
+        result['percentiles'] = {str(p): _or_none(value) for p, value in self.percentiles.items()}
+        for name in FLOAT_FIELDS:
+            result[name] = _or_none(result[name])
+        result['cluster_counts'] = self.cluster_counts
+        return result
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        data = {k: v for k, v in data.items() if k != 'cluster_counts'}
+        data['percentiles'] = {int(p): _or_nan(value) for p, value in data['percentiles'].items()}
+        for name in FLOAT_FIELDS:
+            data[name] = _or_nan(data[name])
+        return cls(**data)
+
+    def format(self):
+        """Text report: range, quartiles, every percentile, then the clusters."""
+        unit = f'$/{self.units}'
+        lines = [
+            f'US State Average Price ({self.window}, {unit}):',
+            f'  Low:    ${self.low:.2f}',
+            f'  Median: ${self.median:.2f}',
+            f'  High:   ${self.high:.2f}',
+            f'Percentiles ({self.window}, {unit}):',
+        ]
+        lines += [f'  {p}th: ${self.percentiles[p]:.2f}' for p in QUARTILES if p in self.percentiles]
+        lines.append(f'Percentiles ({self.window}, {unit}):')
+        lines += [f'  {p:3d}th: ${value:.2f}' for p, value in self.percentiles.items()]
+        lines += [
+            f'\nState Clusters ({self.window}, {unit}):',
+            f'Low   (<= ${self.low_cut:.2f}): {", ".join(self.clusters["Low"])}',
+            f'Median(>  ${self.low_cut:.2f} and <= ${self.high_cut:.2f}): {", ".join(self.clusters["Median"])}',
+            f'High  (>  ${self.high_cut:.2f}): {", ".join(self.clusters["High"])}',
+        ]
+        return '\n'.join(lines)
+
+
+def sorted_percentiles(sorted_values, percentiles):
+    """Linearly interpolated percentiles of an already sorted, NaN-free array."""
+    n = len(sorted_values)
+    if not n:
+        return np.full(len(percentiles), np.nan)
+    position = np.asarray(percentiles, dtype=float) / 100 * (n - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, n - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def summarize_prices(prices_df, value_col='nat_gas_price', state_col='state', percentiles=DEFAULT_PERCENTILES,
+                     high_cut=HIGH_CUT, window='2020-2025', units='MWh'):
+    """PriceSummary of one price column across states."""
+    percentiles = sorted(set(percentiles) | {50})  # the median is the Low/Median cut
+    values = prices_df[value_col].to_numpy(dtype=float)
+    states = prices_df[state_col].to_numpy()
+    present = np.flatnonzero(~np.isnan(values))
+    order = present[np.argsort(values[present], kind='stable')]
+    sorted_values = values[order]
+
+    by_percentile = dict(zip(percentiles, sorted_percentiles(sorted_values, percentiles).tolist()))
+    low_cut = by_percentile[50]
+
+    # Rank of each state in the sorted array; clusters are rank ranges
+    rank = np.full(len(values), -1)
+    rank[order] = np.arange(len(order))
+    low_end = np.searchsorted(sorted_values, low_cut, side='right')
+    high_start = np.searchsorted(sorted_values, high_cut, side='right')
+    present_mask = rank >= 0
+    members = {
+        'Low': present_mask & (rank < low_end),
+        'Median': present_mask & (rank >= low_end) & (rank < high_start),
+        'High': present_mask & (rank >= high_start),
+    }
+    n = len(sorted_values)
+    return PriceSummary(
+        window=window,
+        units=units,
+        count=int(n),
+        low=float(sorted_values[0]) if n else float('nan'),
+        median=low_cut,
+        high=float(sorted_values[-1]) if n else float('nan'),
+        percentiles={p: by_percentile[p] for p in percentiles},
+        low_cut=low_cut,
+        high_cut=float(high_cut),
+        clusters={name: states[members[name]].tolist() for name in CLUSTERS},
+    )
+
+
+def print_summary(prices_df, value_col='nat_gas_price', window='2020-2025', units='MWh', high_cut=HIGH_CUT):
+    """Print the text report of summarize_prices, as the map scripts do."""
+    print(summarize_prices(prices_df, value_col, high_cut=high_cut, window=window, units=units).format())
+
+
+def gas_price_summary(start=DEFAULT_START, end=DEFAULT_END, units='MWh', high_cut=HIGH_CUT,
+                      percentiles=DEFAULT_PERCENTILES, file_path=GAS_FILE):
+    """Cached PriceSummary of the per-state average industrial gas price over [start, end]."""
+    percentiles = tuple(percentiles)
+    return cached(('gas_summary', start, end, units, high_cut, percentiles), [file_path],
+                  lambda: summarize_prices(load_gas_prices(start, end, units, file_path), percentiles=percentiles,
+                                           high_cut=high_cut, window=f'{start[:4]}-{end[:4]}', units=units))
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregate
+from data_loader import clear_cache
+from pipeline import monthly_index
+
+
+@pytest.fixture
+def monthly(tmp_path, monkeypatch):
+    """Install a synthetic load_gas_monthly; returns (set_frame, file_path)."""
+    source = tmp_path / 'gas.xls'
+    source.write_bytes(b'')
+    frames = {}
+    monkeypatch.setattr(aggregate, 'load_gas_monthly', lambda units, file_path: frames['df'].copy())
+    clear_cache()
+    yield (lambda df: frames.__setitem__('df', df)), str(source)
+    clear_cache()
+
+
+def _frame(months, start='2020-01', seed=0, states=('TX', 'AL', 'AK')):
+    rng = np.random.default_rng(seed)
+    index = monthly_index(pd.date_range(start, periods=months, freq='MS') + pd.Timedelta(days=14))
+    return pd.DataFrame(rng.uniform(5, 40, size=(months, len(states))), index=index, columns=list(states))
+
+
+def test_compute_matches_pandas():
+    df = _frame(40, seed=1)
+    df.iloc[::7, 1] = np.nan
+    stats = ['mean', 'median', 'min', 'max', 'std', 'count', 'p10', 'p90', 'winter_mean', 'summer_mean']
+    result = aggregate._compute(df.to_numpy(), df.index.month.to_numpy(), stats)
+    winter = df[df.index.month.isin(aggregate.WINTER_MONTHS)].mean()
+    summer = df[df.index.month.isin(aggregate.SUMMER_MONTHS)].mean()
+    expected = {
+        'mean': df.mean(), 'median': df.median(), 'min': df.min(), 'max': df.max(), 'std': df.std(),
+        'count': df.count(), 'p10': df.quantile(0.1), 'p90': df.quantile(0.9),
+        'winter_mean': winter, 'summer_mean': summer,
+    }
+    for stat in stats:
+        np.testing.assert_allclose(result[stat], expected[stat].to_numpy(dtype=float), err_msg=stat)
+
+
+def test_compute_only_requested():
+    result = aggregate._compute(_frame(30).to_numpy(), _frame(30).index.month.to_numpy(), ['trailing_12m_mean'])
+    assert list(result) == ['trailing_12m_mean']
+
+
+def test_trailing_stats_full_windows(monthly):
+    set_frame, path = monthly
+    df = _frame(30)
+    set_frame(df)
+    result = aggregate.state_stats(['trailing_12m_mean', 'trailing_12m_change'], '2020-01-01', '2022-06-30',
+                                   file_path=path)
+    last, previous = df.iloc[-12:].mean(), df.iloc[-24:-12].mean()
+    np.testing.assert_allclose(result['trailing_12m_mean'], last)
+    np.testing.assert_allclose(result['trailing_12m_change'], last / previous - 1)
+
+
+def test_trailing_stats_need_every_month(monthly):
+    set_frame, path = monthly
+    df = _frame(30)
+    df.iloc[-3, 0] = np.nan                      # TX misses one of its last 12 months
+    set_frame(df.drop(df.index[-20]))             # and the base year misses a month for every state
+    stats = ['trailing_12m_mean', 'trailing_12m_change']
+    full = aggregate.state_stats(stats, '2020-01-01', '2022-06-30', file_path=path)
+    assert np.isnan(full.loc['TX', 'trailing_12m_mean'])
+    assert not full[['trailing_12m_mean']].drop('TX').isna().any().any()
+    assert full['trailing_12m_change'].isna().all()
+    # 16 months: no full base year; 8 months: no full trailing year
+    sixteen = aggregate.state_stats(stats, '2021-03-01', '2022-06-30', file_path=path)
+    assert sixteen['trailing_12m_change'].isna().all()
+    eight = aggregate.state_stats(stats, '2021-11-01', '2022-06-30', file_path=path)
+    assert eight['trailing_12m_mean'].isna().all()
+
+
+def test_seasonal_means(monthly):
+    set_frame, path = monthly
+    df = _frame(24)
+    set_frame(df)
+    result = aggregate.seasonal_means('2020-01-01', '2021-12-31', file_path=path)
+    np.testing.assert_allclose(result['winter_mean'], df[df.index.month.isin((12, 1, 2))].mean())
+    np.testing.assert_allclose(result['summer_mean'], df[df.index.month.isin((6, 7, 8))].mean())
+
+
+def test_series_count_calendar_months(monthly):
+    set_frame, path = monthly
+    df = _frame(30)
+    set_frame(df.drop(df.index[5]))               # a missing month must not shift the comparison
+    yoy = aggregate.yoy_change(file_path=path)
+    rolling = aggregate.rolling_mean(3, file_path=path)
+    assert len(yoy) == 30
+    np.testing.assert_allclose(yoy.iloc[20], df.iloc[20] / df.iloc[8] - 1)
+    assert yoy.iloc[17].isna().all()              # compared with the missing month
+    np.testing.assert_allclose(rolling.iloc[-1], df.iloc[-3:].mean())
+    assert rolling.iloc[6].isna().all()           # window includes the missing month
+
+
+def test_unknown_statistic():
+    with pytest.raises(ValueError, match='bogus'):
+        aggregate.state_stats(['mean', 'bogus'])
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from classify import DEFAULT_LABELS, classify, sweep_thresholds
+
+
+def _table(rng, n):
+    df = pd.DataFrame({'nat_gas_price': rng.integers(0, 40, n).astype(float),
+                       'elec_price': rng.integers(80, 130, n).astype(float)})
+    df.loc[rng.random(n) < 0.1, 'elec_price'] = np.nan
+    return df
+
+
+def test_classify_rules():
+    df = pd.DataFrame({'nat_gas_price': [31.0, 30.0, 10.0, 10.0, np.nan],
+                       'elec_price': [100.0, 105.0, 106.0, np.nan, 200.0]})
+    labels = classify(df, {'nat_gas_price': 30.0, 'elec_price': 105.0})
+    assert labels.tolist() == ['green', 'red', 'green', 'gray', 'green']
+
+
+def test_sweep_matches_classify():
+    rng = np.random.default_rng(0)
+    for labels in (DEFAULT_LABELS, ('green', 'red', 'red')):
+        df = _table(rng, 60)
+        grid = {'nat_gas_price': [0.0, 10.0, 20.5, 30.0, 45.0], 'elec_price': [90.0, 105.0, 120.0]}
+        # A small chunk size exercises the chunking
+        result = sweep_thresholds(df, grid, labels=labels, chunk_size=4)
+        assert len(result) == 15
+        for _, row in result.iterrows():
+            rules = {col: row[col] for col in grid}
+            expected = pd.Series(classify(df, rules, labels=labels)).value_counts()
+            for label in set(labels):
+                assert row[label] == expected.get(label, 0)
+
+
+def test_sweep_empty_grid_axis():
+    result = sweep_thresholds(_table(np.random.default_rng(1), 10), {'nat_gas_price': [], 'elec_price': [105.0]})
+    assert len(result) == 0
+    assert list(result.columns) == ['nat_gas_price', 'elec_price', *DEFAULT_LABELS]
@@ -0,0 +1,52 @@
+import threading
+
+import pandas as pd
+import pytest
+
+import data_loader
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'source.xls'
+    path.write_bytes(b'')
+    data_loader.clear_cache()
+    yield str(path)
+    data_loader.clear_cache()
+
+
+def test_cached_builds_once(source):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return pd.Series([1.0, 2.0])
+
+    first = data_loader.cached('series', [source], build)
+    first[0] = 99.0                               # callers get copies
+    assert data_loader.cached('series', [source], build).tolist() == [1.0, 2.0]
+    assert len(calls) == 1
+
+
+def test_least_recently_used_entry_is_evicted(source, monkeypatch):
+    monkeypatch.setattr(data_loader, 'MAX_ENTRIES', 2)
+    evictions = data_loader.cache_stats['evictions']
+    for name in ('a', 'b'):
+        data_loader.cache_put(name, [source], pd.Series([1.0]))
+    assert data_loader.cache_get('a', [source]) is not None     # 'b' is now least recently used
+    data_loader.cache_put('c', [source], pd.Series([1.0]))
+    assert data_loader.cache_get('b', [source]) is None
+    assert data_loader.cache_get('a', [source]) is not None
+    assert data_loader.cache_get('c', [source]) is not None
+    assert data_loader.cache_stats['evictions'] == evictions + 1
+
+
+def test_counting_is_per_thread(source):
+    data_loader.cache_put('a', [source], pd.Series([1.0]))
+    with data_loader.counting() as counts:
+        data_loader.cache_get('a', [source])
+        other = threading.Thread(target=data_loader.cache_get, args=('a', [source]))
+        other.start()
+        other.join()
+        data_loader.cache_put('b', [source], pd.Series([1.0]))
+    assert counts == {'hits': 1, 'misses': 1, 'evictions': 0}
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from facilities import GridIndex, facilities_within, haversine_km, nearest_km, normalize_facilities
+
+
+def _points(rng, n):
+    # Mostly US-like coordinates, plus some near the poles where the longitude span widens
+    lat = np.where(rng.random(n) < 0.1, rng.uniform(-89, 89, n), rng.uniform(20, 60, n))
+    lon = rng.uniform(-170, -60, n)
+    return lat, lon
+
+
+def test_within_matches_brute_force():
+    rng = np.random.default_rng(0)
+    lat, lon = _points(rng, 2000)
+    weights = rng.integers(1, 5, len(lat)).astype(float)
+    for cell_deg in (0.25, 0.5, 2.0):
+        index = GridIndex(lat, lon, cell_deg)
+        for _ in range(70):
+            q_lat, q_lon = _points(rng, 1)
+            radius = float(rng.choice([5, 50, 300, 1500]))
+            positions, distances = index.within(q_lat[0], q_lon[0], radius)
+            all_distances = haversine_km(q_lat[0], q_lon[0], lat, lon)
+            expected = np.flatnonzero(all_distances <= radius)
+            assert sorted(positions.tolist()) == expected.tolist()
+            np.testing.assert_allclose(distances, all_distances[positions])
+            assert (np.diff(distances) >= 0).all()
+            assert index.count_within(q_lat[0], q_lon[0], radius, weights) == weights[expected].sum()
+
+
+def test_cell_counts_match_brute_force():
+    rng = np.random.default_rng(1)
+    lat, lon = _points(rng, 1000)
+    weights = rng.uniform(0, 3, len(lat))
+    index = GridIndex(lat, lon, 1.0)
+    cells = index.cell_counts(weights)
+    row, col = np.floor(lat + 90).astype(int), np.floor(lon + 180).astype(int)
+    expected = pd.DataFrame({'row': row, 'col': col, 'weight': weights}).groupby(['row', 'col'])['weight']
+    expected = pd.DataFrame({'count': expected.size(), 'weight': expected.sum()}).reset_index()
+    assert len(cells) == len(expected)
+    np.testing.assert_allclose(cells['lat'], expected['row'] + 0.5 - 90)
+    np.testing.assert_allclose(cells['lon'], expected['col'] + 0.5 - 180)
+    np.testing.assert_array_equal(cells['count'], expected['count'])
+    np.testing.assert_allclose(cells['weight'], expected['weight'])
+    assert cells['count'].sum() == len(lat)
+
+
+def test_nearest_km_matches_brute_force():
+    rng = np.random.default_rng(2)
+    lat, lon = _points(rng, 300)
+    site_lat, site_lon = _points(rng, 50)
+    result = nearest_km(lat, lon, site_lat, site_lon, chunk_size=64)
+    expected = haversine_km(lat[:, None], lon[:, None], site_lat[None, :], site_lon[None, :]).min(axis=1)
+    np.testing.assert_allclose(result, expected)
+    assert np.isinf(nearest_km(lat, lon, [], [])).all()
+
+
+def test_facilities_within():
+    facilities = normalize_facilities(pd.DataFrame({
+        'Name': ['near', 'far', 'middle'], 'Latitude': [30.0, 45.0, 31.0], 'Longitude': [-97.0, -97.0, -97.0],
+    }))
+    result = facilities_within(facilities, 30.0, -97.0, 200)
+    assert result['name'].tolist() == ['near', 'middle']
+    assert result['distance_km'].iloc[0] == 0.0
@@ -0,0 +1,81 @@
+import os
+
+from figure_cache import FigureCache, figure_key, serialize
+
+
+def _figure(size):
+    return {'data': [{'type': 'scatter', 'name': 'x' * size}], 'layout': {}}
+
+
+def test_key_depends_on_version_and_options():
+    key = figure_key('1:abc', view='category', gas=30.0)
+    assert key == figure_key('1:abc', gas=30.0, view='category')
+    assert key.startswith('1-abc_')
+    assert key != figure_key('1:abd', view='category', gas=30.0)
+    assert key != figure_key('1:abc', view='category', gas=31.0)
+
+
+def test_lru_eviction_by_bytes():
+    payload = serialize(_figure(100))
+    cache = FigureCache(max_bytes=int(len(payload) * 2.5))
+    cache.put('a', _figure(100))
+    cache.put('b', _figure(100))
+    assert cache.get('a') == payload              # 'b' is now least recently used
+    cache.put('c', _figure(100))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats['evictions'] == 1
+    assert cache.nbytes == 2 * len(payload) <= cache.max_bytes
+
+
+def test_oversized_figure_is_not_kept():
+    cache = FigureCache(max_bytes=50)
+    assert cache.put('big', _figure(100)) == serialize(_figure(100))
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_get_or_build_builds_once():
+    cache = FigureCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return _figure(10)
+
+    assert cache.get_or_build('k', build) == cache.get_or_build('k', build)
+    assert len(calls) == 1
+    report = cache.report()
+    assert (report['hits'], report['misses'], report['hit_rate']) == (1, 1, 0.5)
+
+
+def test_disk_tier_serves_a_new_process(tmp_path):
+    first = FigureCache(disk_dir=str(tmp_path))
+    key = figure_key('1:abc', view='category')
+    payload = first.put(key, _figure(10))
+    second = FigureCache(disk_dir=str(tmp_path))   # e.g. a restarted server
+    assert second.get(key) == payload
+    assert second.stats['disk_hits'] == 1
+    assert second.get(key) == payload             # now from memory
+    assert second.stats['hits'] == 1
+
+
+def test_write_removes_older_versions(tmp_path):
+    cache = FigureCache(disk_dir=str(tmp_path))
+    old_a, old_b = figure_key('1:old', view='a'), figure_key('1:old', view='b')
+    cache.put(old_a, _figure(10))
+    cache.put(old_b, _figure(10))
+    new = figure_key('1:new', view='a')
+    cache.put(new, _figure(10))
+    assert sorted(os.listdir(tmp_path)) == [new + '.json']
+    # Older versions are only swept on the first write of a version
+    (tmp_path / (old_a + '.json')).write_bytes(b'{}')
+    cache.put(figure_key('1:new', view='b'), _figure(10))
+    assert (tmp_path / (old_a + '.json')).exists()
+
+
+def test_unwritable_disk_keeps_memory_tier(tmp_path):
+    blocker = tmp_path / 'figures'
+    blocker.write_bytes(b'')                      # a file where the directory should be
+    cache = FigureCache(disk_dir=str(blocker))
+    cache.put('k', _figure(10))
+    assert cache.get('k') is not None
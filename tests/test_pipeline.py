@@ -0,0 +1,12 @@
+import pandas as pd
+
+from pipeline import monthly_index
+
+
+def test_monthly_index_aligns_sources():
+    # EIA stamps the 15th of the month; the World Bank writes '2001M01'
+    eia = monthly_index(pd.to_datetime(['2001-01-15', '2001-02-15']))
+    world_bank = monthly_index(pd.to_datetime(pd.Index(['2001M01', '2001M02']), format='%YM%m'))
+    assert eia.equals(world_bank)
+    assert eia.name == 'date'
+    assert len(pd.DataFrame({'a': [1, 2]}, index=eia).join(pd.DataFrame({'b': [3, 4]}, index=world_bank))) == 2
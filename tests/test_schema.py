@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+import pytest
+
+import snapshot
+from schema import Schema, SchemaError, column, read_header, read_validated, resolve
+
+CODES = {'Texas': 'TX', 'Alabama': 'AL', 'United States': 'US', 'U.S.': 'US'}
+WIDE = Schema(
+    'gas',
+    fields=(column('date', r'Date'),),
+    regions=column('price', r'(?P<name>.+) Price', 'float64'),
+    codes=CODES,
+    required=frozenset(CODES.values()),
+)
+NARROW = Schema('elec', fields=(column('state', r'State'), column('price', r'Average Price \(cents/kWh\)')))
+
+
+def _problems(schema, columns):
+    with pytest.raises(SchemaError) as error:
+        resolve(schema, columns, 'book.xlsx')
+    return error.value.problems
+
+
+def test_resolves_fields_and_regions():
+    columns = resolve(WIDE, ['Date', 'Texas Price', 'Alabama Price', 'United States Price'])
+    assert columns.fields == {'date': 'Date'}
+    assert columns.regions == {'Texas Price': 'TX', 'Alabama Price': 'AL', 'United States Price': 'US'}
+    assert columns.usecols == ['Date', 'Texas Price', 'Alabama Price', 'United States Price']
+
+
+def test_missing_field_suggests_closest_header():
+    problems = _problems(NARROW, ['State', 'Average Price (cents/kWh'])
+    assert len(problems) == 1
+    assert problems[0].startswith("no column for 'price'")
+    assert "closest header: 'Average Price (cents/kWh'" in problems[0]
+
+
+def test_ambiguous_field():
+    schema = Schema('x', fields=(column('price', r'Price.*'),))
+    assert _problems(schema, ['Price 2023', 'Price 2024']) == [
+        "'price' matches several columns: 'Price 2023', 'Price 2024'"]
+
+
+def test_unrecognized_and_unknown_region():
+    problems = _problems(WIDE, ['Date', 'Texas Price', 'Alabama Price', 'United States Price',
+                                'Notes', 'Alabamma Price'])
+    assert problems[0].startswith("unrecognized column 'Notes'")
+    assert problems[1] == "unknown region 'Alabamma' in column 'Alabamma Price'; closest known name: 'Alabama'"
+
+
+def test_duplicate_and_missing_regions():
+    problems = _problems(WIDE, ['Date', 'Texas Price', 'United States Price', 'U.S. Price'])
+    assert problems == ["two columns for US: 'United States Price' and 'U.S. Price'", 'no column for: AL']
+
+
+def test_every_problem_in_one_error():
+    with pytest.raises(SchemaError) as error:
+        resolve(WIDE, ['Day', 'Texas Price', 'Mars Price'], 'book.xlsx')
+    message = str(error.value)
+    assert message.splitlines()[0] == "gas: book.xlsx (sheet 0, header row 1) does not match the expected layout"
+    # No date; 'Day' then fails the region pattern; Mars is unknown; AL and US are missing
+    assert len(error.value.problems) == 4
+    assert all(f'  - {problem}' in message for problem in error.value.problems)
+
+
+def test_read_validated(tmp_path):
+    path = str(tmp_path / 'elec.xlsx')
+    pd.DataFrame({'State': ['Texas', 'Alabama'], 'Notes': ['a', 'b'],
+                  'Average Price (cents/kWh)': [7, 8]}).to_excel(path, index=False)
+    schema = Schema('elec', fields=(column('state', r'State'),
+                                    column('price', r'Average Price \(cents/kWh\)', 'float64')))
+    df, columns = read_validated(schema, path)
+    assert list(df.columns) == ['State', 'Average Price (cents/kWh)']
+    assert df['Average Price (cents/kWh)'].dtype == 'float64'
+    with pytest.raises(SchemaError):
+        read_validated(Schema('elec', fields=(column('price', r'Price'),)), path)
+
+
+@pytest.mark.parametrize('name', sorted(snapshot.SCHEMAS))
+def test_bundled_workbooks_match(name):
+    path = snapshot.SOURCES[name][0]
+    if not os.path.exists(path):
+        pytest.skip(f'{path} not present')
+    schema = snapshot.SCHEMAS[name]
+    resolve(schema, read_header(schema, path), path)
@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scoring
+from facilities import FACILITY_FILE
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        n = int(rng.integers(1, 60))
+        candidates = pd.DataFrame({name: rng.uniform(0, 100, n) for name in scoring.CRITERIA})
+        candidates.loc[rng.random(n) < 0.1, 'elec_price'] = np.nan
+        engine = scoring.ScoringEngine(candidates)
+        weights = dict(zip(scoring.CRITERIA, rng.random(len(scoring.CRITERIA)) + 0.01))
+        k = int(rng.integers(1, n + 2))
+        scores = engine.scores(weights)
+        ranked = np.flatnonzero(~np.isnan(scores))
+        expected = ranked[np.argsort(scores[ranked], kind='stable')][:k]
+        np.testing.assert_array_equal(scores[engine.top_k(weights, k)], scores[expected])
+
+
+@pytest.mark.skipif(os.path.exists(FACILITY_FILE), reason='only the per-state stand-in sites apply')
+def test_stand_in_sites_exclude_own_state():
+    candidates = scoring.state_candidates()
+    # A state's own count sits at its centroid; counting it would make every state with sites distance 0
+    assert (candidates['site_distance'] > 0).all()
+    assert np.isfinite(candidates['site_distance']).all()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import snapshot
+
+
+def _long(values):
+    """Gas-style long frame from {(month, state): value}."""
+    rows = [(pd.Timestamp(month), state, value) for (month, state), value in values.items()]
+    df = pd.DataFrame(rows, columns=['date', 'state', 'value'])
+    df['series'] = snapshot.GAS_SERIES
+    return snapshot._normalize(df)
+
+
+@pytest.fixture
+def ingested(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    source = tmp_path / 'gas.xls'
+    source.write_bytes(b'')
+    values = {('2023-01-01', 'TX'): 4.07, ('2023-01-01', 'AL'): 5.0,
+              ('2023-02-01', 'TX'): 3.9, ('2023-02-01', 'AL'): np.nan}
+    long_df = _long(values)
+    snapshot.write_snapshot('gas', long_df, str(source))
+    snapshot.write_cumulative('gas', snapshot.build_cumulative(long_df), str(source))
+    return values, str(source)
+
+
+def test_append_new_month(ingested):
+    values, source = ingested
+    updated = {**values, ('2023-03-01', 'TX'): 3.5, ('2023-03-01', 'AL'): 4.5}
+    assert snapshot._append_new_rows('gas', _long(updated), source) == 1
+    cumulative = snapshot.read_cumulative('gas')
+    assert cumulative[('sum', 'TX')].iloc[-1] == pytest.approx(4.07 + 3.9 + 3.5)
+    assert cumulative[('count', 'AL')].iloc[-1] == 2
+
+
+def test_revised_history_rebuilds(ingested):
+    values, source = ingested
+    revised = {**values, ('2023-01-01', 'TX'): 999.0, ('2023-03-01', 'TX'): 3.5, ('2023-03-01', 'AL'): 4.5}
+    assert snapshot._append_new_rows('gas', _long(revised), source) is None
+    assert snapshot.read_cumulative('gas')[('sum', 'TX')].iloc[-1] == pytest.approx(4.07 + 3.9)
+
+
+def test_deleted_history_rebuilds(ingested):
+    values, source = ingested
+    trimmed = {k: v for k, v in values.items() if k != ('2023-01-01', 'AL')}
+    trimmed.update({('2023-03-01', 'TX'): 3.5, ('2023-03-01', 'AL'): 4.5})
+    assert snapshot._append_new_rows('gas', _long(trimmed), source) is None
@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from summary import DEFAULT_PERCENTILES, PriceSummary, summarize_prices
+
+
+def _reject_constant(name):
+    raise ValueError(f'not valid JSON: {name}')
+
+
+def test_matches_pandas_quantiles():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(1, 80))
+        prices = rng.lognormal(3, 0.5, n)
+        if rng.random() < 0.5:
+            prices = np.round(prices)                   # ties
+        prices[rng.random(n) < 0.1] = np.nan
+        if np.isnan(prices).all():
+            continue
+        df = pd.DataFrame({'state': [f'S{i}' for i in range(n)], 'nat_gas_price': prices})
+        high_cut = float(rng.uniform(10, 60))
+        result = summarize_prices(df, high_cut=high_cut)
+        series = df['nat_gas_price']
+        expected = series.quantile([p / 100 for p in DEFAULT_PERCENTILES]).to_numpy()
+        np.testing.assert_allclose([result.percentiles[p] for p in DEFAULT_PERCENTILES], expected)
+        assert result.count == series.count()
+        assert (result.low, result.high) == (series.min(), series.max())
+        median = series.median()
+        assert result.clusters['Low'] == df.loc[series <= median, 'state'].tolist()
+        assert result.clusters['Median'] == df.loc[(series > median) & (series <= high_cut), 'state'].tolist()
+        # High is cut by value alone, so with high_cut below the median a state can be Low and High
+        assert result.clusters['High'] == df.loc[series > high_cut, 'state'].tolist()
+
+
+def test_json_round_trip():
+    df = pd.DataFrame({'state': ['TX', 'AL', 'HI'], 'nat_gas_price': [12.0, 20.0, 90.0]})
+    result = summarize_prices(df)
+    assert PriceSummary.from_dict(json.loads(result.to_json())) == result
+
+
+def test_json_without_prices_is_valid():
+    df = pd.DataFrame({'state': ['TX'], 'nat_gas_price': [np.nan]})
+    result = summarize_prices(df)
+    data = json.loads(result.to_json(), parse_constant=_reject_constant)
+    assert data['count'] == 0
+    assert data['low'] is None and data['percentiles']['50'] is None
+    restored = PriceSummary.from_dict(data)
+    assert np.isnan(restored.median) and restored.clusters == result.clusters
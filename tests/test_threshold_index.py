@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from classify import DEFAULT_LABELS, classify
+from threshold_index import ThresholdIndex
+
+COLUMNS = ['nat_gas_price', 'elec_price']
+APP_LABELS = ('green', 'red', 'red')
+
+
+def _table(rng, n):
+    # Integer prices, so thresholds often land exactly on a value (the at-or-below edge)
+    df = pd.DataFrame({col: rng.integers(0, 40, n).astype(float) for col in COLUMNS})
+    for col in COLUMNS:
+        df.loc[rng.random(n) < 0.1, col] = np.nan
+    return df
+
+
+def _thresholds(rng):
+    return {col: float(rng.integers(-2, 42)) + (0.5 if rng.random() < 0.3 else 0.0) for col in COLUMNS}
+
+
+def test_update_matches_classify():
+    rng = np.random.default_rng(0)
+    for case in range(500):
+        df = _table(rng, int(rng.integers(0, 60)))
+        labels = DEFAULT_LABELS if case % 2 else APP_LABELS
+        index = ThresholdIndex(df, COLUMNS, labels=labels)
+        old = _thresholds(rng)
+        current = index.classify(old)
+        np.testing.assert_array_equal(current, classify(df, old, labels=labels))
+        for _ in range(5):
+            new = _thresholds(rng)
+            changed, updated = index.update(current, old, new)
+            expected = classify(df, new, labels=labels)
+            np.testing.assert_array_equal(updated, expected)
+            np.testing.assert_array_equal(np.sort(changed), np.flatnonzero(current != expected))
+            current, old = updated, new
+
+
+def test_update_leaves_labels_unmodified():
+    df = pd.DataFrame({'nat_gas_price': [10.0, 20.0, 30.0], 'elec_price': [100.0, 100.0, 100.0]})
+    index = ThresholdIndex(df, COLUMNS)
+    labels = index.classify({'nat_gas_price': 25.0, 'elec_price': 105.0})
+    before = labels.copy()
+    changed, updated = index.update(labels, {'nat_gas_price': 25.0, 'elec_price': 105.0},
+                                    {'nat_gas_price': 15.0, 'elec_price': 105.0})
+    np.testing.assert_array_equal(labels, before)
+    assert changed.tolist() == [1]
+    assert updated.tolist() == ['red', 'green', 'green']
+
+
+def test_above():
+    df = pd.DataFrame({'nat_gas_price': [5.0, np.nan, 1.0, 3.0], 'elec_price': [0.0, 0.0, 0.0, 0.0]})
+    index = ThresholdIndex(df, COLUMNS)
+    assert sorted(index.above('nat_gas_price', 3.0).tolist()) == [0]
+    assert sorted(index.above('nat_gas_price', 0.0).tolist()) == [0, 2, 3]
@@ -0,0 +1,75 @@
+"""Sorted per-axis index for interactive threshold classification.
+
+Built once from the merged state table, the index answers "which rows are
+above X on this axis" with one binary search per axis, and when thresholds
+move it re-classifies only the rows whose value lies between the old and new
+threshold, which are the only ones whose category can change. Labels follow
+classify.classify: high if any value is above its threshold, low if all are
+at or below, other otherwise (a missing value).
+"""
+import numpy as np
+
+from classify import DEFAULT_LABELS
+
+
+class ThresholdIndex:
+    def __init__(self, df, columns, labels=DEFAULT_LABELS):
+        self.columns = list(columns)
+        self.labels = labels
+        self.size = len(df)
+        self._values = {}
+        self._order = {}
+        self._sorted = {}
+        self._missing = np.zeros(self.size, dtype=bool)
+        for col in self.columns:
+            values = df[col].to_numpy(dtype=float)
+            valid = np.flatnonzero(~np.isnan(values))
+            order = valid[np.argsort(values[valid], kind='stable')]
+            self._values[col] = values
+            self._order[col] = order
+            self._sorted[col] = values[order]
+            self._missing |= np.isnan(values)
+
+    def _position(self, col, threshold):
+        # Rows order[pos:] are strictly above threshold
+        return np.searchsorted(self._sorted[col], threshold, side='right')
+
+    def above(self, col, threshold):
+        """Positional indices of rows strictly above threshold on one axis."""
+        return self._order[col][self._position(col, threshold):]
+
+    def _label_rows(self, rows, thresholds):
+        high, low, other = self.labels
+        any_above = np.zeros(len(rows), dtype=bool)
+        for col in self.columns:
+            any_above |= self._values[col][rows] > thresholds[col]
+        return np.where(any_above, high, np.where(self._missing[rows], other, low))
+
+    def classify(self, thresholds):
+        """Label for every row, given {column: threshold}."""
+        high, low, other = self.labels
+        result = np.where(self._missing, other, low).astype(object)
+        for col in self.columns:
+            result[self.above(col, thresholds[col])] = high
+        return result
+
+    def update(self, labels, old_thresholds, new_thresholds):
+        """Re-classify after a threshold move; returns (changed_rows, new_labels).
+
+        Only rows whose value lies between the old and new threshold on some
+        axis are re-examined; labels is not modified.
+        """
+        candidates = []
+        for col in self.columns:
+            a = self._position(col, old_thresholds[col])
+            b = self._position(col, new_thresholds[col])
+            if a != b:
+                candidates.append(self._order[col][min(a, b):max(a, b)])
+        labels = labels.copy()
+        if not candidates:
+            return np.zeros(0, dtype=int), labels
+        rows = np.unique(np.concatenate(candidates))
+        new = self._label_rows(rows, new_thresholds)
+        changed = rows[new != labels[rows]]
+        labels[rows] = new
+        return changed, labels